@@ -0,0 +1,47 @@
+import sys
+import kconfig
+from kernel.Batch import Batch
+from kernel import Cli
+from kernel.BacklogDeployer import BacklogDeployer
+from SprintPlanning import SprintPlanning
+from SprintClosing import SprintClosing
+
+__version__ = '1.2.0'
+
+factories = {'Planning': SprintPlanning, 'Close': SprintClosing}
+
+
+if __name__ == "__main__":
+    # e.g. python SprintBatch.py 6.1.1:6.2.3 Planning,Close
+    # or headless: python SprintBatch.py deploy --sprint 6.1.1:6.2.3 --action Planning,Close
+    if len(sys.argv) > 1 and sys.argv[1] in Cli.commands:
+        sys.exit(Cli.main(sys.argv[1:], factories))
+
+    if len(sys.argv) < 2:
+        print('Usage: SprintBatch.py sprints [Planning,Close]\n'
+              "\tsprints: a sprint '6.1.1', a range '6.1.1:6.2.3', a release '6.1' or a comma separated list\n"
+              '       SprintBatch.py {print,export,deploy,monitor,diff,search,clean,rollover,bulkedit} --help\n'
+              '\tFIWARE_OFFLINE=1 builds the plans without Jira, from site_config and store/')
+        exit(1)
+
+    sprints = kconfig.agileCalendar.selectSprints(sys.argv[1])
+    actions = sys.argv[2].split(',') if len(sys.argv) > 2 else ['Planning', 'Close']
+    task = Batch(sprints, actions, factories)
+    print('Batch:', task)
+    tool = BacklogDeployer(task, description=False)
+    options = {'0': tool.print,
+               '1': tool.deploy,
+               '2': tool.monitor,
+               '3': tool.search,
+               '4': tool.clean,
+               'E': exit}
+
+    while True:
+        menu = '\nMenu:\n\t0: print\n\t1: deploy \n\t2: monitor \n\t3: search \n\t4: clean \n\tE: Exit'
+        choice = input(menu + '\nEnter your choice[0-4,(E)xit] : ')
+        print('Chosen option:', choice)
+
+        if choice in ('0', '1', '2', '3', '4', 'E'):
+            options[choice]()
+        else:
+            print('\n\n\nWrong option, please try again... ')
@@ -0,0 +1,59 @@
+"""Memory of the slotted component records against dict-backed ones: python -m benchmarks.ComponentsMemory [size]"""
+import sys
+import gc
+import tracemalloc
+from itertools import chain
+
+from kconfig.XmlLoader import Record
+from kconfig.ComponentsBook import Enabler, Tool, LabNode
+
+
+class DictRecord:
+    """Dict-backed stand-in for a component record."""
+    def __init__(self, cmp):
+        for slot in chain.from_iterable(getattr(cls, '__slots__', ()) for cls in reversed(type(cmp).__mro__)):
+            setattr(self, slot, getattr(cmp, slot))
+
+
+def catalogue(size):
+    # 70% enablers, 20% tools, 10% lab nodes
+    for n in range(size):
+        fields = {'cmp_key': str(10000 + n), 'tracker_key': 'TRK{}'.format(n % 12),
+                  'owner': 'Owner {}'.format(n % 50), 'mode': 'Development',
+                  'backlog_keyword': 'Keyword{}'.format(n)}
+        if n % 10 < 7:
+            fields.update(GE='GE {}'.format(n), GEi='GEi {}'.format(n), type='Generic')
+            yield Enabler(Record('enabler', {'name': 'Enabler{}'.format(n), 'chapter': 'Chapter'}, fields), 'Leader')
+        elif n % 10 < 9:
+            yield Tool(Record('tool', {'name': 'Tool{}'.format(n), 'chapter': 'Chapter'}, fields), 'Leader')
+        else:
+            yield LabNode(Record('node', {'name': 'Node{}'.format(n)}, fields), 'Leader')
+
+
+def footprint(build):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    records = build()
+    stop = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in stop.compare_to(start, 'filename'))
+    return records, size
+
+
+def main(size=10000):
+    slotted = list(catalogue(size))
+    # only the records are measured, the attribute values are shared by both variants
+    _, new = footprint(lambda: [type(cmp).__new__(type(cmp)) for cmp in slotted])
+    _, old = footprint(lambda: [DictRecord(cmp) for cmp in slotted])
+    _, filled = footprint(lambda: list(catalogue(size)))
+
+    print('components:            {}'.format(size))
+    print('dict-backed records:   {:10.1f} KiB  {:6.0f} B/component'.format(old / 1024, old / size))
+    print('slotted records:       {:10.1f} KiB  {:6.0f} B/component'.format(new / 1024, new / size))
+    print('saving:                {:10.1f} %'.format(100 * (old - new) / old))
+    print('slotted catalogue incl. attribute values: {:.1f} KiB'.format(filled / 1024))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
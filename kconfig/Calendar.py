@@ -1,15 +1,49 @@
 import os
+from bisect import bisect_right
 from collections import OrderedDict, namedtuple
-from xml.etree import ElementTree
-from datetime import date
+from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 from itertools import groupby
+from kconfig.XmlLoader import iterrecords
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 __author__ = "Manuel Escriche <mev@tid.es>"
 
 CalendarEntry = namedtuple('CalendarEntry', 'id, month, year')
 
 
+def daily(cache, key, compute):
+    """Value of compute() cached in cache under key until the day changes."""
+    today = date.today()
+    cached = cache.get(key)
+    if cached is None or cached[0] != today:
+        cached = cache[key] = (today, compute())
+    return cached[1]
+
+
+def as_date(value):
+    """date of a date, datetime or ISO string (only the date part is read), None stays None."""
+    if value is None or type(value) is date:
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+
+
+def as_datetime64(values):
+    """numpy day array of a datetime64 array or of a sequence accepted by as_date(), None as NaT."""
+    if isinstance(values, numpy.ndarray) and values.dtype.kind == 'M':
+        return values.astype('datetime64[D]')
+    return numpy.array(['NaT' if value is None else
+                        value[:10] if isinstance(value, str) else
+                        as_date(value).isoformat() if isinstance(value, date) else value
+                        for value in values], dtype='datetime64[D]')
+
+
 class Calendar(OrderedDict):
     month_names = {'01': 'Jan', '02': 'Feb', '03': 'Mar', '04': 'Apr', '05': 'May', '06': 'Jun',
                    '07': 'Jul', '08': 'Aug', '09': 'Sep', '10': 'Oct', '11': 'Nov', '12': 'Dec'}
@@ -20,10 +54,7 @@ class Calendar(OrderedDict):
         self.configHome = os.path.join(os.path.split(self.codeHome)[0], 'site_config')
         xmlfile = os.path.join(self.configHome, 'Calendar.xml')
         # print(xmlfile)
-        tree = ElementTree.parse(xmlfile)
-        root = tree.getroot()
-
-        for _entry in root.findall('entry'):
+        for _entry in iterrecords(xmlfile, 'entry'):
             _id = _entry.get('id')
             month = _entry.get('month')
             year = _entry.get('year')
@@ -32,6 +63,18 @@ class Calendar(OrderedDict):
         self.start = date(int(self['M01'].year), int(self['M01'].month), 1)
         self.months = list(self.keys())
         self.monthBook = {month: '{1}-{2}'.format(*self[month]) for month in self}
+        self.monthOrdinal = {month: n for n, month in enumerate(self.months, start=1)}
+        self._daily = dict()
+
+    def monthStart(self, month_id):
+        entry = self[month_id]
+        return date(int(entry.year), int(entry.month), 1)
+
+    def monthEnd(self, month_id):
+        """First day after the month."""
+        entry = self[month_id]
+        year, month = int(entry.year), int(entry.month)
+        return date(year + month // 12, month % 12 + 1, 1)
 
     def getMonth(self, month):
         start = self.start + relativedelta(months=month - 1)
@@ -41,10 +84,13 @@ class Calendar(OrderedDict):
     @property
     def pastMonths(self):
         month = self.currentMonth[0]
-        return [item for item in self if int(item[1:]) <= month]
+        return self.months[:month]
 
     @property
     def currentMonth(self):
+        return daily(self._daily, 'currentMonth', self._currentMonth)
+
+    def _currentMonth(self):
         d1, d2 = date.today(), self.start
         month = (12 * d1.year + d1.month) - (12 * d2.year + d2.month) + 1
         month_id = self.months[month - 1]
@@ -83,10 +129,7 @@ class AgileCalendar(OrderedDict):
         self.configHome = os.path.join(os.path.split(self.codeHome)[0], 'site_config')
         self.calendar = Calendar()
         xmlfile = os.path.join(self.configHome, 'AgileCalendar.xml')
-        tree = ElementTree.parse(xmlfile)
-        root = tree.getroot()
-
-        for _sprint in root.findall('sprint'):
+        for _sprint in iterrecords(xmlfile, 'sprint'):
             sprint = _sprint.get('id')
             release = sprint[:3]
             month = _sprint.get('month')
@@ -97,9 +140,106 @@ class AgileCalendar(OrderedDict):
 
         self.Sprints = ['Sprint {}'.format(sprint) for sprint in self.sprints]
         self.Releases = ['Release {}'.format(release) for release in self.releases]
+        self.index()
+
+    def index(self):
+        self.sprintMonth = {self[month].sprint: month for month in self}
+        self.releaseSprints = OrderedDict()
+        for month in self:
+            self.releaseSprints.setdefault(self[month].release, []).append(self[month].sprint)
+        self._validSprints = set(self.Sprints)
+        self._validReleases = set(self.Releases)
+
+        # sprint months sorted by first day, for bisect
+        months = sorted(self, key=self.calendar.monthStart)
+        self._months = months
+        self._starts = [self.calendar.monthStart(month) for month in months]
+        self._ends = [self.calendar.monthEnd(month) for month in months]
+        position = {month: n for n, month in enumerate(self)}
+        self._ordinals = [position[month] for month in months]
+        if numpy is not None:
+            self._npStarts = numpy.array(self._starts, dtype='datetime64[D]')
+            self._npEnds = numpy.array(self._ends, dtype='datetime64[D]')
+            self._npOrdinals = numpy.array(self._ordinals)
+            # ordinal -1, i.e. outside the calendar, picks the trailing None
+            self._npSprints = numpy.array(self.sprints + [None], dtype=object)
+            self._npReleases = numpy.array(self.releases + [None], dtype=object)
+        self._daily = dict()
+
+    def releaseRange(self, release):
+        """First and last sprint of a release."""
+        sprints = self.releaseSprints[release]
+        return sprints[0], sprints[-1]
+
+    def sprintStart(self, sprint):
+        """First day of the month of a sprint."""
+        return self.calendar.monthStart(self.sprintMonth[sprint])
+
+    def selectSprints(self, spec):
+        """Sprints of a spec, e.g. '6.1.1', '6.1.1:6.2.3', '6.1' or a comma separated list, in order."""
+        selected = set()
+        for item in (item.strip() for item in spec.split(',') if item.strip()):
+            first, _, last = item.partition(':')
+            if not last and first in self.releaseSprints:
+                selected.update(self.releaseSprints[first])
+                continue
+            try:
+                i, j = self.sprints.index(first), self.sprints.index(last or first)
+            except ValueError:
+                raise ValueError('{} is not a sprint nor a release of the calendar'.format(item))
+            selected.update(self.sprints[i:j + 1])
+        return [sprint for sprint in self.sprints if sprint in selected]
+
+    def monthOf(self, day):
+        """Month id of the sprint running on the given date, None outside the calendar."""
+        i = bisect_right(self._starts, day) - 1
+        if i < 0 or day >= self._ends[i]:
+            return None
+        return self._months[i]
+
+    def sprintOf(self, day):
+        month = self.monthOf(day)
+        return self[month].sprint if month else None
+
+    def releaseOf(self, day):
+        month = self.monthOf(day)
+        return self[month].release if month else None
+
+    def ordinalsOf(self, dates):
+        """Position in self.sprints of the sprint of every date, -1 outside the calendar."""
+        if numpy is None:
+            ordinals = list()
+            for day in map(as_date, dates):
+                i = bisect_right(self._starts, day) - 1 if day else -1
+                ordinals.append(self._ordinals[i] if i >= 0 and day < self._ends[i] else -1)
+            return ordinals
+
+        days = as_datetime64(dates)
+        i = numpy.searchsorted(self._npStarts, days, side='right') - 1
+        j = i.clip(0)
+        # NaT compares False, so dates missing are outside too
+        inside = (i >= 0) & (days < self._npEnds[j])
+        return numpy.where(inside, self._npOrdinals[j], -1)
+
+    def sprintsOf(self, dates):
+        """Sprint of every date (see ordinalsOf), None outside the calendar."""
+        ordinals = self.ordinalsOf(dates)
+        if numpy is None:
+            return [self.sprints[n] if n >= 0 else None for n in ordinals]
+        return self._npSprints[ordinals]
+
+    def releasesOf(self, dates):
+        """Release of every date (see ordinalsOf), None outside the calendar."""
+        ordinals = self.ordinalsOf(dates)
+        if numpy is None:
+            return [self.releases[n] if n >= 0 else None for n in ordinals]
+        return self._npReleases[ordinals]
 
     @property
     def currentTimeSlots(self):
+        return list(daily(self._daily, 'currentTimeSlots', self._currentTimeSlots))
+
+    def _currentTimeSlots(self):
         month = self.calendar.currentMonth[1]
         sprint = [self[month].sprint]
         release = [self[month].release]
@@ -107,8 +247,11 @@ class AgileCalendar(OrderedDict):
 
     @property
     def pastTimeSlots(self):
+        return list(daily(self._daily, 'pastTimeSlots', self._pastTimeSlots))
+
+    def _pastTimeSlots(self):
         month = self.calendar.currentMonth[1]
-        i = self.calendar.months.index(month) - 1
+        i = self.calendar.monthOrdinal[month] - 2
         sprints = [sprint for sprint in self.sprints[:i] if sprint != self.sprints[i]]
         _releases = [release for release in self.releases[:i] if release != self.releases[i]]
         releases = [key for key, _ in groupby(_releases)]
@@ -116,8 +259,11 @@ class AgileCalendar(OrderedDict):
 
     @property
     def futureTimeSlots(self):
+        return list(daily(self._daily, 'futureTimeSlots', self._futureTimeSlots))
+
+    def _futureTimeSlots(self):
         month = self.calendar.currentMonth[1]
-        i = self.calendar.months.index(month) - 1
+        i = self.calendar.monthOrdinal[month] - 2
         sprints = [sprint for sprint in self.sprints[i:] if sprint != self.sprints[i]]
         _releases = [release for release in self.releases[i:] if release != self.releases[i]]
         releases = [key for key, _ in groupby(_releases)]
@@ -125,9 +271,7 @@ class AgileCalendar(OrderedDict):
 
     @property
     def nextSprint(self):
-        _month = self.calendar.currentMonth[1]
-        month = self.calendar.months.index(_month) + 1
-        return 'Sprint {}'.format(self[month].sprint)
+        return 'Sprint {}'.format(self.next_sprint)
 
     @property
     def next_sprint(self):
@@ -141,28 +285,34 @@ class AgileCalendar(OrderedDict):
 
     @property
     def prevSprint(self):
-        _month = self.calendar.currentMonth[1] - 1
-        month = self.calendar.months.index(_month) - 1
-        return 'Sprint {}'.format(self[month].sprint)
+        return 'Sprint {}'.format(self.prev_sprint)
 
     @property
     def prev_sprint(self):
         month = self.calendar.prevMonth[1]
         return self[month].sprint
 
+    def _neighbour_sprint(self, sprint, step):
+        try:
+            month = self.sprintMonth[sprint]
+        except KeyError:
+            raise ValueError('{} is not a sprint of the calendar'.format(sprint))
+        ordinal = self.calendar.monthOrdinal[month] + step
+        if not 1 <= ordinal <= len(self.calendar.months) or self.calendar.months[ordinal - 1] not in self:
+            raise ValueError('no sprint {} {} in the calendar'.format('before' if step < 0 else 'after', sprint))
+        return self[self.calendar.months[ordinal - 1]].sprint
+
     def get_prev_sprint(self, sprint):
-        for entry in self:
-            if sprint == self[entry].sprint:
-                prev_month = 'M{}'.format(int(self[entry].month[1:]) - 1)
-                return self[prev_month].sprint
-        else:
-            raise ValueError
+        return self._neighbour_sprint(sprint, -1)
+
+    def get_next_sprint(self, sprint):
+        return self._neighbour_sprint(sprint, 1)
 
     def isValidSprint(self, timeSlot):
-        return True if timeSlot in self.Sprints else False
+        return timeSlot in self._validSprints
 
     def isValidRelease(self, timeSlot):
-        return True if timeSlot in self.Releases else False
+        return timeSlot in self._validReleases
 
     @property
     def projectTime(self):
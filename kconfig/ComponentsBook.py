@@ -1,67 +1,45 @@
 import os
 import re
+import atexit
 import pickle
+import threading
 from datetime import datetime
 from collections import OrderedDict, namedtuple
 from operator import attrgetter
-from xml.etree import ElementTree as Et
-from kconfig import settings
+from kconfig.Singleton import Singleton
+from kconfig.XmlLoader import iterrecords
+from kernel import tool_settings
 from kernel.Connector import Connector
+from kernel.Offline import Offline
 
 __author__ = "Manuel Escriche <mev@tid.es>"
 
 
 class ComponentLeaders(dict):
-    def __init__(self):
+    """Snapshot of the component leaders in store/, updated at exit with those found in Jira."""
+    _found = dict()
+    _lock = threading.Lock()
+
+    def __init__(self, leaders=None):
         super().__init__()
         self.timestamp = datetime.now().strftime("%Y%m%d-%H%M")
         self.filename = 'FIWARE.components.leaders' + '.' + self.timestamp + '.pkl'
+        if leaders is not None:
+            self.update(leaders)
+            return
         codeHome = os.path.dirname(os.path.abspath(__file__))
         configHome = os.path.join(os.path.split(codeHome)[0], 'site_config')
 
-        xmlfile = os.path.join(configHome, 'Enablers.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('enabler'):
-            key = item.find('cmp_key').text
-            try:
-                self[key] = self.find_leader(key)
-            except Exception:
-                raise Exception
-
-        xmlfile = os.path.join(configHome, 'Tools.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('tool'):
-            key = item.find('cmp_key').text
-            try:
-                self[key] = self.find_leader(key)
-            except Exception:
-                raise Exception
-
-        xmlfile = os.path.join(configHome, 'Coordination.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('coordinator'):
-            key = item.find('cmp_key').text
-            try:
-                self[key] = self.find_leader(key)
-            except Exception:
-                raise Exception
-
-        xmlfile = os.path.join(configHome, 'WorkGroups.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('group'):
-            key = item.find('cmp_key').text
-            try:
-                self[key] = self.find_leader(key)
-            except Exception:
-                raise Exception
+        for filename, tag in (('Enablers.xml', 'enabler'), ('Tools.xml', 'tool'),
+                              ('Coordination.xml', 'coordinator'), ('WorkGroups.xml', 'group')):
+            xmlfile = os.path.join(configHome, filename)
+            # print(xmlfile)
+            for item in iterrecords(xmlfile, tag):
+                key = item.text('cmp_key')
+                try:
+                    self[key] = self.find_leader(key)
+                except Exception:
+                    raise Exception
 
         self.save()
         self.clean()
@@ -74,15 +52,34 @@ class ComponentLeaders(dict):
             leader = 'Unknown'
         return leader
 
+    @classmethod
+    def found(cls, key, leader):
+        with cls._lock:
+            if not cls._found:
+                atexit.register(cls.snapshot)
+            cls._found[key] = leader
+
+    @classmethod
+    def snapshot(cls):
+        try:
+            leaders = dict(cls.fromFile())
+        except Exception:
+            leaders = dict()
+        with cls._lock:
+            leaders.update(cls._found)
+        snapshot = ComponentLeaders(leaders)
+        snapshot.save()
+        snapshot.clean()
+
     def save(self):
         # print(self)
-        longfilename = os.path.join(settings.storeHome, self.filename)
+        longfilename = os.path.join(tool_settings.storeHome, self.filename)
         with open(longfilename, 'wb') as f:
             pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
 
     @classmethod
     def fromFile(cls):
-        filelist = os.listdir(settings.storeHome)
+        filelist = os.listdir(tool_settings.storeHome)
         mfilter = re.compile(r'\bFIWARE\.components\.leaders\.(?P<day>\d{8})[-](?P<time>\d{4})[.]pkl\b')
         record = namedtuple('record', 'filename, day, time')
         filelist = [record(mfilter.match(f).group(0),
@@ -91,11 +88,11 @@ class ComponentLeaders(dict):
         filelist.sort(key=attrgetter('day', 'time'), reverse=True)
         filename = filelist[0].filename
         # print('load-fromFile', filename)
-        with open(os.path.join(settings.storeHome, filename), 'rb') as f:
+        with open(os.path.join(tool_settings.storeHome, filename), 'rb') as f:
             return pickle.load(f)
 
     def clean(self):
-        filelist = os.listdir(settings.storeHome)
+        filelist = os.listdir(tool_settings.storeHome)
         mfilter = re.compile(r'\bFIWARE\.components\.leaders\.(?P<day>\d{8})[-](?P<time>\d{4})[.]pkl\b')
         record = namedtuple('record', 'filename, day, time')
         filelist = [record(mfilter.match(f).group(0),
@@ -105,14 +102,15 @@ class ComponentLeaders(dict):
         toremove = filelist[5:]
         if len(toremove) > 0:
             for item in toremove:
-                os.remove(os.path.join(settings.storeHome, item.filename))
+                os.remove(os.path.join(tool_settings.storeHome, item.filename))
 
 
 class Component:
+    __slots__ = ('key', 'tracker', 'name', '_leader')
+
     def __init__(self, comp, leader):
-        tagsList = [child.tag for child in comp]
-        self.key = comp.find('cmp_key').text
-        self.tracker = comp.find('tracker_key').text
+        self.key = comp.text('cmp_key')
+        self.tracker = comp.text('tracker_key')
         self.name = comp.get('name')
         self._leader = leader
 
@@ -128,7 +126,12 @@ class Component:
     @property
     def leader(self):
         if self._leader == 'Unknown':
+            if Offline.enabled:
+                Offline.flag('leader of {}'.format(self.key), 'not in the leaders snapshot, Unknown offline')
+                return self._leader
             self._leader = self.find_leader()
+            if self._leader != 'Unknown':
+                ComponentLeaders.found(self.key, self._leader)
         return self._leader
 
     def __repr__(self):
@@ -136,236 +139,208 @@ class Component:
 
 
 class Enabler(Component):
+    __slots__ = ('chapter', 'owner', 'type', 'mode', 'backlogKeyword', 'packageKeyword', 'dissemination',
+                 'GE', 'GEi', 'Name')
+
     def __init__(self, enabler, leader):
         super().__init__(enabler, leader)
-        tagsList = [child.tag for child in enabler]
         self.chapter = enabler.get('chapter')
-        self.owner = enabler.find('owner').text if 'owner' in tagsList else 'Unknown'
-        self.type = enabler.find('type').text if 'type' in tagsList else 'Unknown'
-        self.mode = enabler.find('mode').text if 'mode' in tagsList else 'Development'
-        self.backlogKeyword = enabler.find('backlog_keyword').text if 'backlog_keyword' in tagsList else 'Unknown'
-        self.packageKeyword = enabler.find('package_keyword').text if 'package_keyword' in tagsList else 'Unknown'
-        self.dissemination = enabler.find('dissemination').text if 'dissemination' in tagsList else 'Open'
-        self.GE = enabler.find('GE').text if 'GE' in tagsList else None
-        self.GEi = enabler.find('GEi').text if 'GEi' in tagsList else None
+        self.owner = enabler.text('owner', 'Unknown')
+        self.type = enabler.text('type', 'Unknown')
+        self.mode = enabler.text('mode', 'Development')
+        self.backlogKeyword = enabler.text('backlog_keyword', 'Unknown')
+        self.packageKeyword = enabler.text('package_keyword', 'Unknown')
+        self.dissemination = enabler.text('dissemination', 'Open')
+        self.GE = enabler.text('GE')
+        self.GEi = enabler.text('GEi')
         self.Name = '{} - {}'.format(self.GE, self.GEi) if self.GEi else self.GE
 
 
 class Tool(Component):
+    __slots__ = ('chapter', 'owner', 'mode', 'backlogKeyword')
+
     def __init__(self, tool, leader):
         super().__init__(tool, leader)
-        tagsList = [child.tag for child in tool]
         self.chapter = tool.get('chapter')
-        self.owner = tool.find('owner').text if 'owner' in tagsList else 'Unknown'
-        self.mode = tool.find('mode').text if 'mode' in tagsList else 'Development'
-        self.backlogKeyword = tool.find('backlog_keyword').text if 'backlog_keyword' in tagsList else 'Unknown'
+        self.owner = tool.text('owner', 'Unknown')
+        self.mode = tool.text('mode', 'Development')
+        self.backlogKeyword = tool.text('backlog_keyword', 'Unknown')
 
 
 class Coordinator(Component):
+    __slots__ = ('project', 'owner', 'backlogKeyword')
+
     def __init__(self, coordinator, leader):
         super().__init__(coordinator, leader)
-        tagsList = [child.tag for child in coordinator]
         self.project = coordinator.get('tracker')
-        self.owner = coordinator.find('owner').text if 'owner' in tagsList else 'Unknown'
-        self.backlogKeyword = coordinator.find('backlog_keyword').text if 'backlog_keyword' in tagsList else 'Unknown'
+        self.owner = coordinator.text('owner', 'Unknown')
+        self.backlogKeyword = coordinator.text('backlog_keyword', 'Unknown')
         # print(self)
 
 
 class Channel(Component):
+    __slots__ = ('inbox',)
+
     def __init__(self, channel, leader):
         super().__init__(channel, leader)
-        tagsList = [child.tag for child in channel]
-        self.inbox = channel.find('inbox').text if 'inbox' in tagsList else 'Unknown'
+        self.inbox = channel.text('inbox', 'Unknown')
 
 
 class AccountChannel(Component):
+    __slots__ = ()
+
     def __init__(self, channel, leader):
         super().__init__(channel, leader)
-        tagsList = [child.tag for child in channel]
 
 
 class Group(Component):
+    __slots__ = ('group', 'owner', 'mode', 'backlogKeyword')
+
     def __init__(self, group, leader):
         super().__init__(group, leader)
-        tagsList = [child.tag for child in group]
         self.group = group.get('group')
-        self.owner = group.find('owner').text if 'owner' in tagsList else 'Unknown'
-        self.mode = group.find('mode').text if 'mode' in tagsList else 'Active'
-        self.backlogKeyword = group.find('backlog_keyword').text if 'backlog_keyword' in tagsList else 'Unknown'
+        self.owner = group.text('owner', 'Unknown')
+        self.mode = group.text('mode', 'Active')
+        self.backlogKeyword = group.text('backlog_keyword', 'Unknown')
 
 
 class LabComp(Component):
+    __slots__ = ('owner', 'backlogKeyword', 'mode')
+
     def __init__(self, cmp, leader):
         super().__init__(cmp, leader)
-        tagsList = [child.tag for child in cmp]
-        self.owner = cmp.find('owner').text if 'owner' in tagsList else 'Unknown'
-        self.backlogKeyword = cmp.find('backlog_keyword').text if 'backlog_keyword' in tagsList else 'Unknown'
-        self.mode = cmp.find('mode').text if 'mode' in tagsList else 'Active'
+        self.owner = cmp.text('owner', 'Unknown')
+        self.backlogKeyword = cmp.text('backlog_keyword', 'Unknown')
+        self.mode = cmp.text('mode', 'Active')
 
 
 class LabNode(Component):
+    __slots__ = ('owner', 'backlogKeyword', 'mode')
+
     def __init__(self, cmp, leader):
         super().__init__(cmp, leader)
-        tagsList = [child.tag for child in cmp]
-        self.owner = cmp.find('owner').text if 'owner' in tagsList else 'Unknown'
-        self.backlogKeyword = cmp.find('backlog_keyword').text if 'backlog_keyword' in tagsList else 'Unknown'
-        self.mode = cmp.find('mode').text if 'mode' in tagsList else 'Active'
-
-
-class ComponentsBook(OrderedDict):
-    _singlenton = None
-
-    def __new__(cls, *args, **kwargs):
-        if not cls._singlenton:
-            cls._singlenton = super(ComponentsBook, cls).__new__(cls, *args, **kwargs)
-        return cls._singlenton
-
-    def __init__(self):
+        self.owner = cmp.text('owner', 'Unknown')
+        self.backlogKeyword = cmp.text('backlog_keyword', 'Unknown')
+        self.mode = cmp.text('mode', 'Active')
+
+
+class ComponentsBook(OrderedDict, metaclass=Singleton):
+    _typeIndexes = OrderedDict([(Enabler, ('enablersByKey', 'enablersByName')),
+                                (Tool, ('toolsByKey', 'toolsByName')),
+                                (Group, ('groupsByKey', 'groupsByName')),
+                                (Coordinator, ('coordinatorsByKey', 'coordinatorsByName')),
+                                (Channel, ('helpDeskByKey', 'helpDeskByName')),
+                                (AccountChannel, ('labAccountsDeskByKey', 'labAccountsDeskByName')),
+                                (LabComp, ('labCompByKey', 'labCompByName')),
+                                (LabNode, ('labNodesByKey', 'labNodesByName'))])
+    _queryIndexes = ('chapter', 'tracker', 'mode', 'owner')
+    # site_config files in loading order, with the component type of each element tag
+    _files = OrderedDict([('Enablers.xml', {'enabler': Enabler}),
+                          ('Tools.xml', {'tool': Tool}),
+                          ('WorkGroups.xml', {'group': Group}),
+                          ('Coordination.xml', {'coordinator': Coordinator}),
+                          ('HelpdeskChannels.xml', {'channel': Channel}),
+                          ('AccountsChannels.xml', {'channel': AccountChannel}),
+                          ('LabNodes.xml', {'component': LabComp, 'node': LabNode})])
+
+    def __init__(self, previous=None, changed=()):
+        """Load the components, parsing again only the changed files of a previous book."""
         super().__init__()
         codeHome = os.path.dirname(os.path.abspath(__file__))
         self.configHome = os.path.join(os.path.split(codeHome)[0], 'site_config')
-        try:
-            self.leaders = ComponentLeaders.fromFile()
-        except Exception:
-            pass
-
-        self.add_enablers()
-        self.enablersByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == Enabler)
-        self.enablersByName = OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == Enabler)
-
-        self.add_tools()
-        self.toolsByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == Tool)
-        self.toolsByName = OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == Tool)
-
-        self.add_groups()
-        self.groupsByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == Group)
-        self.groupsByName = OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == Group)
-
-        self.add_coordinators()
-        self.coordinatorsByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == Coordinator)
-        self.coordinatorsByName = \
-            OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == Coordinator)
-
-        self.add_helpDeskChannels()
-        self.helpDeskByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == Channel)
-        self.helpDeskByName = OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == Channel)
-
-        self.add_labAccountsChannels()
-        self.labAccountsDeskByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == AccountChannel)
-        self.labAccountsDeskByName = \
-            OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == AccountChannel)
-
-        self.add_lab()
-        self.labCompByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == LabComp)
-        self.labCompByName = OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == LabComp)
-        self.labNodesByKey = OrderedDict((cmp, self[cmp]) for cmp in self if type(self[cmp]) == LabNode)
-        self.labNodesByName = OrderedDict((self[cmp].name, self[cmp]) for cmp in self if type(self[cmp]) == LabNode)
-
-    def add_enablers(self):
-        xmlfile = os.path.join(self.configHome, 'Enablers.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('enabler'):
-            key = item.find('cmp_key').text
-            try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
-            except Exception:
-                leader = 'Unknown'
-            self[key] = Enabler(item, leader)
-
-    def add_tools(self):
-        xmlfile = os.path.join(self.configHome, 'Tools.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('tool'):
-            key = item.find('cmp_key').text
-            try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
-            except Exception:
-                leader = 'Unknown'
-            self[key] = Tool(item, leader)
-            # print(self[key])
-
-    def add_coordinators(self):
-        xmlfile = os.path.join(self.configHome, 'Coordination.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('coordinator'):
-            key = item.find('cmp_key').text
+        if previous is not None:
+            self.leaders = previous.leaders
+        else:
             try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
+                self.leaders = ComponentLeaders.fromFile()
             except Exception:
-                leader = 'Unknown'
-
-            self[key] = Coordinator(item, leader)
-
-    def add_helpDeskChannels(self):
-        xmlfile = os.path.join(self.configHome, 'HelpdeskChannels.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('channel'):
-            key = item.find('cmp_key').text
-            try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
-            except Exception:
-                leader = 'Unknown'
-
-            self[key] = Channel(item, leader)
-
-    def add_labAccountsChannels(self):
-        xmlfile = os.path.join(self.configHome, 'AccountsChannels.xml')
+                self.leaders = dict()
+            if Offline.enabled:
+                snapshot = getattr(self.leaders, 'timestamp', None)
+                Offline.flag('component leaders', 'from the snapshot of {}'.format(snapshot) if snapshot
+                             else 'no snapshot in store/, all Unknown')
+
+        self.sources = dict()
+        for filename, types in ComponentsBook._files.items():
+            if previous is not None and filename not in changed:
+                self.sources[filename] = previous.sources[filename]
+                for key in self.sources[filename]:
+                    self[key] = previous[key]
+            else:
+                self.add_components(filename, **types)
+        self.index()
+
+    @staticmethod
+    def types(filenames):
+        """Component types loaded from the given site_config files."""
+        return set(cmp_type for filename in filenames if filename in ComponentsBook._files
+                   for cmp_type in ComponentsBook._files[filename].values())
+
+    def index(self):
+        # one pass over the book fills every typed and query index
+        typed = dict()
+        for cmp_type, (by_key, by_name) in ComponentsBook._typeIndexes.items():
+            setattr(self, by_key, OrderedDict())
+            setattr(self, by_name, OrderedDict())
+            typed[cmp_type] = (getattr(self, by_key), getattr(self, by_name))
+
+        self._indexes = {attr: dict() for attr in ComponentsBook._queryIndexes}
+        self.trackerIndex = dict()
+        for key, cmp in self.items():
+            by_key, by_name = typed[type(cmp)]
+            by_key[key] = cmp
+            by_name[cmp.name] = cmp
+            self.trackerIndex.setdefault(cmp.tracker, dict()).setdefault(type(cmp), OrderedDict())[cmp.name] = cmp
+            for attr, index in self._indexes.items():
+                value = getattr(cmp, attr, None)
+                if value is not None:
+                    index.setdefault(value, OrderedDict())[key] = cmp
+
+    def trackerComponents(self, tracker):
+        """Components of a tracker grouped by type, each group by name."""
+        return self.trackerIndex.get(tracker, dict())
+
+    def _lookup(self, attr, value):
+        return self._indexes[attr].get(value, OrderedDict())
+
+    def byChapter(self, chapter):
+        return self._lookup('chapter', chapter)
+
+    def byTracker(self, tracker):
+        return self._lookup('tracker', tracker)
+
+    def byMode(self, mode):
+        return self._lookup('mode', mode)
+
+    def byOwner(self, owner):
+        return self._lookup('owner', owner)
+
+    def byType(self, cmp_type):
+        return getattr(self, ComponentsBook._typeIndexes[cmp_type][0])
+
+    def query(self, chapter=None, tracker=None, mode=None, owner=None, cmp_type=None):
+        """Components matching every given criterion, by key and in book order."""
+        criteria = dict(chapter=chapter, tracker=tracker, mode=mode, owner=owner)
+        candidates = [self._lookup(attr, value) for attr, value in criteria.items() if value is not None]
+        if cmp_type is not None:
+            candidates.append(self.byType(cmp_type))
+        if not candidates:
+            return OrderedDict(self)
+
+        # walk the smallest index and check the rest by membership
+        candidates.sort(key=len)
+        smallest, others = candidates[0], candidates[1:]
+        return OrderedDict((key, cmp) for key, cmp in smallest.items() if all(key in other for other in others))
+
+    def add_components(self, filename, **types):
+        xmlfile = os.path.join(self.configHome, filename)
         # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('channel'):
-            key = item.find('cmp_key').text
-            try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
-            except Exception:
-                leader = 'Unknown'
-
-            self[key] = AccountChannel(item, leader)
-
-    def add_groups(self):
-        xmlfile = os.path.join(self.configHome, 'WorkGroups.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('group'):
-            key = item.find('cmp_key').text
-            try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
-            except Exception:
-                leader = 'Unknown'
-
-            self[key] = Group(item, leader)
-
-    def add_lab(self):
-        xmlfile = os.path.join(self.configHome, 'LabNodes.xml')
-        # print(xmlfile)
-        tree = Et.parse(xmlfile)
-        root = tree.getroot()
-        for item in root.findall('component'):
-            key = item.find('cmp_key').text
-            try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
-            except Exception:
-                leader = 'Unknown'
-
-            self[key] = LabComp(item, leader)
-
-        for item in root.findall('node'):
-            key = item.find('cmp_key').text
-            try:
-                leader = self.leaders[key] if key in self.leaders else 'Unknown'
-            except Exception:
-                leader = 'Unknown'
-
-            self[key] = LabNode(item, leader)
+        self.sources[filename] = keys = list()
+        for item in iterrecords(xmlfile, *types):
+            key = item.text('cmp_key')
+            leader = self.leaders.get(key, 'Unknown')
+            self[key] = types[item.tag](item, leader)
+            keys.append(key)
 
 
 # tComponentsBook = ComponentsBook()
@@ -1,16 +1,15 @@
 import os
-from xml.etree import ElementTree
+from kconfig.XmlLoader import iterrecords
 
 __author__ = "Manuel Escriche <mev@tid.es>"
 
 
 class Server:
     def __init__(self, server):
-        tags_list = [child.tag for child in server]
         self.name = server.get('name')
-        self.domain = server.find('domain').text
-        self.username = server.find('username').text if 'username' in tags_list else None
-        self.password = server.find('password').text if 'password' in tags_list else None
+        self.domain = server.text('domain')
+        self.username = server.text('username')
+        self.password = server.text('password')
 
 
 class Settings:
@@ -22,10 +21,8 @@ class Settings:
         # print(self.storeHome)
         xmlfile = os.path.join(self.configHome, 'Settings.xml')
         # print(xmlfile)
-        tree = ElementTree.parse(xmlfile)
-        root = tree.getroot()
         self.server = dict()
-        for _server in root.findall('server'):
+        for _server in iterrecords(xmlfile, 'server'):
             name = _server.get('name')
             self.server[name] = Server(_server)
 
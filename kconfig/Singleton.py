@@ -0,0 +1,39 @@
+import threading
+
+
+class Singleton(type):
+    """Metaclass of the configuration books: one instance per process, built on first call."""
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._instance = None
+        cls._lock = threading.RLock()
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls._instance
+        if instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__call__(*args, **kwargs)
+                instance = cls._instance
+        return instance
+
+    def built(cls):
+        """The current instance, or None if nobody has asked for it yet."""
+        return cls._instance
+
+    def create(cls, *args, **kwargs):
+        """A fresh instance, not yet seen by anybody calling the class."""
+        return super().__call__(*args, **kwargs)
+
+    def install(cls, instance):
+        with cls._lock:
+            cls._instance = instance
+        return instance
+
+    def reload(cls, *args, **kwargs):
+        with cls._lock:
+            return cls.install(cls.create(*args, **kwargs))
+
+
+if __name__ == "__main__":
+    pass
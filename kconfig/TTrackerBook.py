@@ -1,21 +1,25 @@
 import os
 from collections import OrderedDict
-from xml.etree import ElementTree
 
-from kconfig import enablersBookByName, toolsBookByName, workingGroupsBookByName, \
-    coordinationBook, helpdeskCompBookByName, accountsDeskBookByName, labCompBook, labNodesBook
+from kconfig.Singleton import Singleton
+from kconfig.XmlLoader import iterrecords
+from kconfig.ComponentsBook import ComponentsBook, Enabler, Tool, Coordinator, Channel, AccountChannel, \
+    Group, LabComp, LabNode
 
 __author__ = "Manuel Escriche <mev@tid.es>"
 
 
 class Tracker:
-    def __init__(self, tracker):
-        tags_list = [child.tag for child in tracker]
+    # component types a tracker takes its children from
+    _components = ()
+    __slots__ = ('name', 'type', 'keystone', 'leader', 'inbox')
+
+    def __init__(self, tracker, components):
         self.name = tracker.get('name')
         self.type = tracker.get('type')
-        self.keystone = tracker.find('keystone').text
-        self.leader = tracker.find('leader').text if 'leader' in tags_list else 'Unknown'
-        self.inbox = tracker.find('inbox').text if 'inbox' in tags_list else 'Unknown'
+        self.keystone = tracker.text('keystone')
+        self.leader = tracker.text('leader', 'Unknown')
+        self.inbox = tracker.text('inbox', 'Unknown')
 
     @property
     def tracker(self):
@@ -30,108 +34,112 @@ class Tracker:
 
 
 class Chapter(Tracker):
-    def __init__(self, chapter):
-        super().__init__(chapter)
-        tags_list = [child.tag for child in chapter]
-
-        self.architect = chapter.find('architect').text if 'architect' in tags_list else None
-        self.Name = chapter.find('name').text if 'name' in tags_list else None
+    _components = (Enabler, Tool, Coordinator)
+    __slots__ = ('architect', 'Name', 'enablers', 'tools', 'coordination')
 
-        self.enablers = OrderedDict((name, enablersBookByName[name])
-                                    for name in enablersBookByName if enablersBookByName[name].tracker == self.keystone)
+    def __init__(self, chapter, components):
+        super().__init__(chapter, components)
+        self.architect = chapter.text('architect')
+        self.Name = chapter.text('name')
 
-        self.tools = OrderedDict((name, toolsBookByName[name])
-                                 for name in toolsBookByName if toolsBookByName[name].tracker == self.keystone)
-
-        coordination = [coordinationBook[key]
-                        for key in coordinationBook if coordinationBook[key].tracker == self.keystone]
+        self.enablers = OrderedDict(components.get(Enabler, ()))
+        self.tools = OrderedDict(components.get(Tool, ()))
 
+        coordination = list(components.get(Coordinator, dict()).values())
         self.coordination = coordination[0] if len(coordination) else None
         # print(coordination, self.coordination)
 
 
 class HelpDesk(Tracker):
-    def __init__(self, tracker):
-        super().__init__(tracker)
-        # tagsList = [child.tag for child in tracker]
-        self.channels = OrderedDict((name, helpdeskCompBookByName[name])
-                                    for name in helpdeskCompBookByName
-                                    if helpdeskCompBookByName[name].tracker == self.keystone)
+    _components = (Channel,)
+    __slots__ = ('channels',)
+
+    def __init__(self, tracker, components):
+        super().__init__(tracker, components)
+        self.channels = OrderedDict(components.get(Channel, ()))
 
 
 class AccountsDesk(Tracker):
-    def __init__(self, tracker):
-        super().__init__(tracker)
-        # tagsList = [child.tag for child in tracker]
+    _components = (AccountChannel,)
+    __slots__ = ('channels',)
 
-        self.channels = OrderedDict((name, accountsDeskBookByName[name])
-                                    for name in accountsDeskBookByName
-                                    if accountsDeskBookByName[name].tracker == self.keystone)
+    def __init__(self, tracker, components):
+        super().__init__(tracker, components)
+
+        self.channels = OrderedDict(components.get(AccountChannel, ()))
 
 
 class WorkGroup(Tracker):
-    def __init__(self, tracker):
-        super().__init__(tracker)
-        # tagsList = [child.tag for child in tracker]
-        self.groups = OrderedDict((name, workingGroupsBookByName[name])
-                                  for name in workingGroupsBookByName
-                                  if workingGroupsBookByName[name].tracker == self.keystone)
+    _components = (Group, Coordinator)
+    __slots__ = ('groups', 'coordination')
+
+    def __init__(self, tracker, components):
+        super().__init__(tracker, components)
+        self.groups = OrderedDict(components.get(Group, ()))
 
-        coordination = [coordinationBook[key]
-                        for key in coordinationBook if coordinationBook[key].tracker == self.keystone]
+        coordination = list(components.get(Coordinator, dict()).values())
 
         self.coordination = coordination[0] if len(coordination) else None
 
 
 class Lab(Tracker):
-    def __init__(self, tracker):
-        super().__init__(tracker)
-        # tagsList = [child.tag for child in tracker]
+    _components = (LabComp, LabNode, Coordinator)
+    __slots__ = ('comps', 'nodes', 'coordination')
 
-        self.comps = OrderedDict((name, labCompBook[name])
-                                 for name in labCompBook if labCompBook[name].tracker == self.keystone)
+    def __init__(self, tracker, components):
+        super().__init__(tracker, components)
 
-        self.nodes = OrderedDict((name, labNodesBook[name])
-                                 for name in labNodesBook if labNodesBook[name].tracker == self.keystone)
+        self.comps = OrderedDict(components.get(LabComp, ()))
+        self.nodes = OrderedDict(components.get(LabNode, ()))
 
-        coordination = [coordinationBook[key]
-                        for key in coordinationBook if coordinationBook[key].tracker == self.keystone]
+        coordination = list(components.get(Coordinator, dict()).values())
 
         self.coordination = coordination[0] if len(coordination) else None
 
 
 class Management(Tracker):
-    def __init__(self, tracker):
-        super().__init__(tracker)
-        # tagsList = [child.tag for child in tracker]
+    __slots__ = ()
 
+    def __init__(self, tracker, components):
+        super().__init__(tracker, components)
 
-class TrackerBook:
+
+class TrackerBook(metaclass=Singleton):
     _typeDict = {'CHAPTER': Chapter, 'MNG': Management, 'WG': WorkGroup,
                  'HDESK': HelpDesk, 'ADESK': AccountsDesk, 'LAB': Lab}
-    _singlenton = None
-
-    def __new__(cls, *args, **kwargs):
-        if not cls._singlenton:
-            cls._singlenton = super(TrackerBook, cls).__new__(cls, *args, **kwargs)
-        return cls._singlenton
 
-    def __init__(self):
+    def __init__(self, components_book=None, previous=None, changed=None):
+        """Build the trackers, rebuilding only those of the changed component types of a previous book."""
         self.codeHome = os.path.dirname(os.path.abspath(__file__))
         self.configHome = os.path.join(os.path.split(self.codeHome)[0], 'site_config')
         xmlfile = os.path.join(self.configHome, 'Trackers.xml')
         # print(xmlfile)
-        tree = ElementTree.parse(xmlfile)
-        root = tree.getroot()
+        components_book = components_book if components_book is not None else ComponentsBook()
+        if previous is not None:
+            self.records = previous.records
+            rebuilt = TrackerBook.types(changed)
+        else:
+            self.records = OrderedDict((_tracker.text('keystone'), _tracker)
+                                       for _tracker in iterrecords(xmlfile, 'tracker'))
+
         self.trackersByKey = OrderedDict()
-        for _tracker in root.findall('tracker'):
-            keystone = _tracker.find('keystone').text
-            tracker_type = _tracker.get('type')
-            self.trackersByKey[keystone] = TrackerBook._typeDict[tracker_type](_tracker)
+        for keystone, _tracker in self.records.items():
+            tracker_type = TrackerBook._typeDict[_tracker.get('type')]
+            if previous is not None and tracker_type not in rebuilt:
+                self.trackersByKey[keystone] = previous.trackersByKey[keystone]
+                continue
+            components = components_book.trackerComponents(keystone)
+            self.trackersByKey[keystone] = tracker_type(_tracker, components)
 
         self.trackersByName = OrderedDict((self.trackersByKey[item].name, self.trackersByKey[item])
                                           for item in self.trackersByKey)
 
+    @staticmethod
+    def types(changed):
+        """Tracker types reading any of the given component types."""
+        return set(tracker_type for tracker_type in TrackerBook._typeDict.values()
+                   if set(changed).intersection(tracker_type._components))
+
     def __getitem__(self, item):
         if item in self.trackersByKey:
             return self.trackersByKey[item]
@@ -145,16 +153,11 @@ class TrackerBook:
         return self.trackersByName.__iter__()
 
 
-class ChapterBook:
-    _singlenton = None
+class ChapterBook(metaclass=Singleton):
+    _trackerType = Chapter
 
-    def __new__(cls, *args, **kwargs):
-        if not cls._singlenton:
-            cls._singlenton = super(ChapterBook, cls).__new__(cls, *args, **kwargs)
-        return cls._singlenton
-
-    def __init__(self):
-        trackers_book = TrackerBook()
+    def __init__(self, trackers_book=None):
+        trackers_book = trackers_book if trackers_book is not None else TrackerBook()
         self.chaptersByKey = OrderedDict((trackers_book[item].keystone, trackers_book[item])
                                          for item in trackers_book if type(trackers_book[item]) == Chapter)
 
@@ -181,16 +184,11 @@ class ChapterBook:
         return len(self.chaptersByKey)
 
 
-class WorkGroupBook:
-    _singlenton = None
-
-    def __new__(cls, *args, **kwargs):
-        if not cls._singlenton:
-            cls._singlenton = super(WorkGroupBook, cls).__new__(cls, *args, **kwargs)
-        return cls._singlenton
+class WorkGroupBook(metaclass=Singleton):
+    _trackerType = WorkGroup
 
-    def __init__(self):
-        trackers_book = TrackerBook()
+    def __init__(self, trackers_book=None):
+        trackers_book = trackers_book if trackers_book is not None else TrackerBook()
         self.workingGroupByKey = OrderedDict((trackers_book[item].keystone, trackers_book[item])
                                              for item in trackers_book if type(trackers_book[item]) == WorkGroup)
 
@@ -217,16 +215,11 @@ class WorkGroupBook:
         return len(self.workingGroupByKey)
 
 
-class HelpDeskBook:
-    _singlenton = None
+class HelpDeskBook(metaclass=Singleton):
+    _trackerType = HelpDesk
 
-    def __new__(cls, *args, **kwargs):
-        if not cls._singlenton:
-            cls._singlenton = super(HelpDeskBook, cls).__new__(cls, *args, **kwargs)
-        return cls._singlenton
-
-    def __init__(self):
-        trackers_book = TrackerBook()
+    def __init__(self, trackers_book=None):
+        trackers_book = trackers_book if trackers_book is not None else TrackerBook()
         self.deskByKey = OrderedDict((trackers_book[item].keystone, trackers_book[item])
                                      for item in trackers_book if type(trackers_book[item]) == HelpDesk)
 
@@ -253,16 +246,11 @@ class HelpDeskBook:
         return len(self.deskByKey)
 
 
-class AccountsDeskBook:
-    _singlenton = None
-
-    def __new__(cls, *args, **kwargs):
-        if not cls._singlenton:
-            cls._singlenton = super(AccountsDeskBook, cls).__new__(cls, *args, **kwargs)
-        return cls._singlenton
+class AccountsDeskBook(metaclass=Singleton):
+    _trackerType = AccountsDesk
 
-    def __init__(self):
-        trackers_book = TrackerBook()
+    def __init__(self, trackers_book=None):
+        trackers_book = trackers_book if trackers_book is not None else TrackerBook()
         self.deskByKey = OrderedDict((trackers_book[item].keystone, trackers_book[item])
                                      for item in trackers_book if type(trackers_book[item]) == AccountsDesk)
 
@@ -289,16 +277,11 @@ class AccountsDeskBook:
         return len(self.deskByKey)
 
 
-class LabBook:
-    _singlenton = None
-
-    def __new__(cls, *args, **kwargs):
-        if not cls._singlenton:
-            cls._singlenton = super(LabBook, cls).__new__(cls, *args, **kwargs)
-        return cls._singlenton
+class LabBook(metaclass=Singleton):
+    _trackerType = Lab
 
-    def __init__(self):
-        trackers_book = TrackerBook()
+    def __init__(self, trackers_book=None):
+        trackers_book = trackers_book if trackers_book is not None else TrackerBook()
         self.labsByKey = OrderedDict((trackers_book[item].keystone, trackers_book[item])
                                      for item in trackers_book if type(trackers_book[item]) == Lab)
 
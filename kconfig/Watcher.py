@@ -0,0 +1,57 @@
+import os
+import threading
+import kconfig
+
+
+class ConfigWatcher:
+    """Keeps a long-running process in step with site_config."""
+    def __init__(self, interval=10):
+        codeHome = os.path.dirname(os.path.abspath(__file__))
+        self.configHome = os.path.join(os.path.split(codeHome)[0], 'site_config')
+        self.interval = interval
+        self._stamps = self.scan()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def scan(self):
+        stamps = dict()
+        for filename in os.listdir(self.configHome):
+            if filename.endswith('.xml'):
+                stat = os.stat(os.path.join(self.configHome, filename))
+                stamps[filename] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def poll(self):
+        stamps = self.scan()
+        changed = set(filename for filename in set(stamps) | set(self._stamps)
+                      if stamps.get(filename) != self._stamps.get(filename))
+        if changed:
+            kconfig.refresh(changed)
+        self._stamps = stamps
+        return changed
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='site_config watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                changed = self.poll()
+            except Exception as e:
+                print('site_config reload failed, keeping current configuration:', e)
+            else:
+                if changed:
+                    print('site_config reloaded:', ', '.join(sorted(changed)))
+
+
+if __name__ == "__main__":
+    pass
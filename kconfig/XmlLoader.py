@@ -0,0 +1,41 @@
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+
+
+class Record(namedtuple('Record', 'tag, attrib, fields')):
+    """A top level element of a site_config file: its attributes and the text of its children."""
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        return self.attrib.get(key, default)
+
+    def text(self, tag, default=None):
+        return self.fields.get(tag, default)
+
+
+def iterrecords(xmlfile, *tags):
+    """Stream the records directly under the root whose tag is one of tags."""
+    depth = 0
+    root = None
+    for event, elem in iterparse(xmlfile, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth != 1:
+            continue
+
+        if elem.tag in tags:
+            fields = dict()
+            for child in elem:
+                # as find() does, the first child with a given tag wins
+                fields.setdefault(child.tag, child.text)
+            yield Record(elem.tag, dict(elem.attrib), fields)
+        root.clear()
+
+
+if __name__ == "__main__":
+    pass
@@ -1,36 +1,167 @@
-from .Settings import Settings
+import sys
+import threading
+from types import ModuleType
 
 __author__ = 'Manuel Escriche'
 
-# Get Settings values
-settings = Settings()
+# The configuration objects below are expensive (ComponentsBook may even reach
+# Jira to resolve leaders), so they are built on first access and memoized in the
+# module namespace instead of at import time. Call preload() to warm them all.
 
-from .Calendar import AgileCalendar
-from .ComponentsBook import ComponentsBook
 
-# Get information related to Components
-tComponentsBook = ComponentsBook()
+def _settings():
+    from .Settings import Settings
+    return Settings()
 
-enablersBookByName = tComponentsBook.enablersByName
-toolsBookByName = tComponentsBook.toolsByName
-workingGroupsBookByName = tComponentsBook.groupsByName
-coordinationBook = tComponentsBook.coordinatorsByKey
-helpdeskCompBookByName = tComponentsBook.helpDeskByName
-accountsDeskBookByName = tComponentsBook.labAccountsDeskByName
-labCompBook = tComponentsBook.labCompByName
-labNodesBook = tComponentsBook.labNodesByName
 
-from .TTrackerBook import TrackerBook, ChapterBook, WorkGroupBook
-from .TTrackerBook import LabBook
+def _agile_calendar():
+    from .Calendar import AgileCalendar
+    return AgileCalendar()
 
-# Get information about Agile Calendar
-agileCalendar = AgileCalendar()
-calendar = agileCalendar.calendar
 
-# Get information about Chapter, Workgroup and Lab
+def _components_book():
+    from .ComponentsBook import ComponentsBook
+    return ComponentsBook()
 
-chaptersBook = ChapterBook()
 
-workGroupBook = WorkGroupBook()
+def _chapters_book():
+    from .TTrackerBook import ChapterBook
+    return ChapterBook()
 
-labsBookByName = LabBook().labsByName
+
+def _workgroup_book():
+    from .TTrackerBook import WorkGroupBook
+    return WorkGroupBook()
+
+
+def _labs_book_by_name():
+    from .TTrackerBook import LabBook
+    return LabBook().labsByName
+
+
+_loaders = {
+    # Get Settings values
+    'settings': _settings,
+
+    # Get information about Agile Calendar
+    'agileCalendar': _agile_calendar,
+    'calendar': lambda: _module.agileCalendar.calendar,
+
+    # Get information related to Components
+    'tComponentsBook': _components_book,
+    'enablersBookByName': lambda: _components_book().enablersByName,
+    'toolsBookByName': lambda: _components_book().toolsByName,
+    'workingGroupsBookByName': lambda: _components_book().groupsByName,
+    'coordinationBook': lambda: _components_book().coordinatorsByKey,
+    'helpdeskCompBookByName': lambda: _components_book().helpDeskByName,
+    'accountsDeskBookByName': lambda: _components_book().labAccountsDeskByName,
+    'labCompBook': lambda: _components_book().labCompByName,
+    'labNodesBook': lambda: _components_book().labNodesByName,
+
+    # Get information about Chapter, Workgroup and Lab
+    'chaptersBook': _chapters_book,
+    'workGroupBook': _workgroup_book,
+    'labsBookByName': _labs_book_by_name,
+}
+
+
+# memoized names to update when one of the books is swapped
+_bookNames = {
+    'ComponentsBook': ('tComponentsBook', 'enablersBookByName', 'toolsBookByName', 'workingGroupsBookByName',
+                       'coordinationBook', 'helpdeskCompBookByName', 'accountsDeskBookByName',
+                       'labCompBook', 'labNodesBook'),
+    'ChapterBook': ('chaptersBook',),
+    'WorkGroupBook': ('workGroupBook',),
+    'LabBook': ('labsBookByName',),
+}
+
+_refreshLock = threading.Lock()
+
+
+def preload():
+    """Build every configuration object now, e.g. at start-up of a long-running process."""
+    for name in _loaders:
+        getattr(_module, name)
+
+
+def reload():
+    """Rebuild the books from site_config, e.g. after the configuration files have changed."""
+    from .ComponentsBook import ComponentsBook
+    from .TTrackerBook import TrackerBook, ChapterBook, WorkGroupBook, HelpDeskBook, AccountsDeskBook, LabBook
+
+    # dependencies first, each book reads the ones above it
+    for book in (ComponentsBook, TrackerBook, ChapterBook, WorkGroupBook, HelpDeskBook, AccountsDeskBook, LabBook):
+        book.reload()
+
+    for name in _loaders:
+        _module.__dict__.pop(name, None)
+
+
+def refresh(filenames):
+    """Rebuild only what depends on the given site_config files and swap it in."""
+    from .ComponentsBook import ComponentsBook
+    from .TTrackerBook import TrackerBook, ChapterBook, WorkGroupBook, HelpDeskBook, AccountsDeskBook, LabBook
+
+    filenames = set(filenames)
+    with _refreshLock:
+        names = dict()
+        if 'Settings.xml' in filenames and 'settings' in _module.__dict__:
+            names['settings'] = _settings()
+        if filenames & {'Calendar.xml', 'AgileCalendar.xml'} and 'agileCalendar' in _module.__dict__:
+            names['agileCalendar'] = _agile_calendar()
+            names['calendar'] = names['agileCalendar'].calendar
+
+        books = list()
+        components_book = ComponentsBook.built()
+        changed = ComponentsBook.types(filenames)
+        if components_book is not None and changed:
+            components_book = ComponentsBook.create(previous=components_book, changed=filenames)
+            books.append((ComponentsBook, components_book))
+
+        trackers_book = TrackerBook.built()
+        if trackers_book is not None and 'Trackers.xml' in filenames:
+            trackers_book = TrackerBook.create(components_book)
+            rebuilt = set(TrackerBook._typeDict.values())
+        elif trackers_book is not None and changed:
+            trackers_book = TrackerBook.create(components_book, previous=trackers_book, changed=changed)
+            rebuilt = TrackerBook.types(changed)
+        else:
+            rebuilt = set()
+        if rebuilt:
+            books.append((TrackerBook, trackers_book))
+
+        for book in (ChapterBook, WorkGroupBook, HelpDeskBook, AccountsDeskBook, LabBook):
+            if book.built() is not None and book._trackerType in rebuilt:
+                books.append((book, book.create(trackers_book)))
+
+        # the plan rules, parsed once per process by PlanBuilder when it is in use
+        builder = sys.modules.get('kernel.PlanBuilder')
+        rules = builder.PlanRules() if builder is not None and 'PlanRules.xml' in filenames else None
+
+        # swap in
+        for book, instance in books:
+            book.install(instance)
+        if rules is not None:
+            builder.PlanBuilder.reload(rules)
+        for book, _ in books:
+            names.update((name, _loaders[name]()) for name in _bookNames.get(book.__name__, ())
+                         if name in _module.__dict__)
+        _module.__dict__.update(names)
+        return [book.__name__ for book, _ in books]
+
+
+class _LazyModule(ModuleType):
+    def __getattr__(self, name):
+        # only called when the name is not yet in the module namespace
+        try:
+            loader = _loaders[name]
+        except KeyError:
+            raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+        return self.__dict__.setdefault(name, loader())
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(_loaders))
+
+
+_module = sys.modules[__name__]
+_module.__class__ = _LazyModule
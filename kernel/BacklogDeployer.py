@@ -1,11 +1,20 @@
 import re
+import time
+import threading
+import requests
 from jira.client import JIRA
 from kernel import tool_settings
+from kernel.Transport import Transport
+from kernel.Template import render
+from kernel.Offline import Offline
 
 __author__ = "Manuel Escriche <mev@tid.es>"
 
 
 class IssueDefinition:
+    __slots__ = ('project', 'component', 'sprint', '_sprint', 'fixVersion', 'deadline', 'inwards', 'outwards',
+                 'issue', 'assignee', 'watchers', 'reporter')
+
     def __init__(self, sprint, deadline):
         self.project = None
         self.component = None
@@ -28,59 +37,160 @@ class IssueDefinition:
 
 
 class BacklogDeployer:
+    """Creates, links, finds and removes the issues of a plan in Jira."""
+    _jira = None
+    retries = 2
+    backoff = 1
+    indexFields = 'summary,project,status,description,duedate,fixVersions,components,assignee'
+
+    @classmethod
+    def connect(cls):
+        """The Jira client of the process, shared by every deployer and the release calendar."""
+        if cls._jira is None:
+            server = tool_settings.server['JIRA']
+            # no server info nor update check: nothing is sent before the first real request
+            options = {'server': 'https://{}'.format(server.domain), 'check_update': False}
+            cls._jira = JIRA(options, basic_auth=(server.username, server.password), get_server_info=False)
+            # its requests go through the pools and the login of the process transport
+            Transport.getInstance().mount(cls._jira._session)
+        return cls._jira
 
     def __init__(self, task, description=False):
-        server = tool_settings.server['JIRA']
-        options = {'server': 'https://{}'.format(server.domain)}
-        self.jira = JIRA(options, basic_auth=(server.username, server.password))
+        self.jira = BacklogDeployer.connect()
         self.task = task
         self.description = description
+        self.index = dict()
+        self.indexed = set()
+        self.adopted = set()
+        self._indexLock = threading.Lock()
 
     def print(self):
         print('--> Backlog ')
-        for k, issue in enumerate(self.task.issues, start=1):
-            print(k, issue.summary(), ' : Deadline=', issue.deadline, ' : Assignee=', issue.assignee)
+        texts = render(self.task.issues)
+        for k, (issue, (summary, description)) in enumerate(zip(self.task.issues, texts), start=1):
+            print(k, summary, ' : Deadline=', issue.deadline, ' : Assignee=', issue.assignee)
             if self.description:
-                print(k, issue.description())
+                print(k, description)
             for link in issue.inwards:
                 print('\t in:', link.summary())
             for link in issue.outwards:
                 print('\t out', link.summary())
             print('\n')
+        if Offline.stale():
+            print('--> Offline, built with values that may be out of date:')
+            for flag in Offline.stale():
+                print('\t', flag)
+
+    @staticmethod
+    def fields(iss_desc):
+        duedate = iss_desc.deadline.strftime('%Y-%m-%d') if iss_desc.deadline else None
+
+        issue_dict = {'project': {'key': iss_desc.project},
+                      'components': [{'id': iss_desc.component}],
+                      'summary': iss_desc.summary(),
+                      'description': iss_desc.description(),
+                      'issuetype': {'name': 'WorkItem'},
+                      'fixVersions': [{'name': iss_desc.fixVersion}],
+                      'duedate': duedate}
+
+        if iss_desc.reporter:
+            issue_dict['reporter'] = {'name': iss_desc.reporter}
+        return issue_dict
+
+    @staticmethod
+    def _query(projects, sprints):
+        return 'project in ({}) and ({})'.format(
+            ', '.join(sorted(projects)),
+            ' or '.join('summary ~ "\\"Sprint-{}\\""'.format(re.sub(r'\.', '', sprint)) for sprint in sorted(sprints)))
+
+    def _index(self, query):
+        for issue in self.jira.search_issues(query, maxResults=False, fields=BacklogDeployer.indexFields):
+            self.index[(issue.fields.project.key, issue.fields.summary)] = issue
+
+    def seed(self, projects, sprints):
+        """Indexes the issues in Jira of the given sprints and projects not indexed yet, in one search."""
+        with self._indexLock:
+            pending = set((project, sprint) for project in projects for sprint in sprints) - self.indexed
+            if pending:
+                self._index(self._query(set(project for project, _ in pending), set(sprint for _, sprint in pending)))
+                self.indexed |= pending
+
+    @staticmethod
+    def transient(error):
+        """Whether a failed request may succeed if sent again, and may even have been carried out."""
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        status = getattr(error, 'status_code', None)
+        return status is not None and status >= 500
+
+    def create(self, iss_desc):
+        key = (iss_desc.project, iss_desc.summary())
+        self.seed([iss_desc.project], [iss_desc.sprint])
+        for attempt in range(BacklogDeployer.retries + 1):
+            issue = self.index.get(key)
+            if issue is not None:
+                # already in Jira, from an earlier deploy or from an attempt whose answer was lost
+                self.adopted.add(issue.key)
+                if not attempt:
+                    iss_desc.issue = issue
+                    return issue
+                break
+            try:
+                issue = self.jira.create_issue(fields=self.fields(iss_desc))
+            except Exception as e:
+                if attempt == BacklogDeployer.retries or not self.transient(e):
+                    raise
+                time.sleep(BacklogDeployer.backoff * 2 ** attempt)
+                with self._indexLock:
+                    self._index(self._query([iss_desc.project], [iss_desc.sprint]))
+                continue
+            self.index[key] = issue
+            break
+
+        if iss_desc.reporter:
+            self.jira.remove_watcher(issue, 'mev')
+
+        if iss_desc.assignee:
+            self.jira.assign_issue(issue, iss_desc.assignee)
+
+        if len(iss_desc.watchers):
+            for watcher in iss_desc.watchers:
+                self.jira.add_watcher(issue, watcher)
+
+        iss_desc.issue = issue
+        return issue
+
+    def link(self, iss_desc):
+        for _iss_desc in iss_desc.outwards:
+            self.jira.create_issue_link('relates to', iss_desc.issue.key, _iss_desc.issue.key)
+
+    def find(self, iss_desc):
+        """The Jira issue of a definition, looked up by its summary when deployed by another run."""
+        if iss_desc.issue is not None:
+            return iss_desc.issue
+        summary = iss_desc.summary()
+        if (iss_desc.project, iss_desc.sprint) in self.indexed:
+            issue = self.index.get((iss_desc.project, summary))
+            if issue is not None:
+                iss_desc.issue = issue
+            return issue
+        query = 'project = {} and component = {} and summary ~ "\\"{}\\""'\
+            .format(iss_desc.project, iss_desc.component, summary)
+        for issue in self.jira.search_issues(query):
+            if issue.fields.summary == summary:
+                iss_desc.issue = issue
+                return issue
+        return None
 
     def deploy(self):
         print('--> DEPLOYING')
+        self.seed(set(iss_desc.project for iss_desc in self.task.issues),
+                  set(iss_desc.sprint for iss_desc in self.task.issues))
         for iss_desc in self.task.issues:
-            duedate = iss_desc.deadline.strftime('%Y-%m-%d') if iss_desc.deadline else None
-
-            issue_dict = {'project': {'key': iss_desc.project},
-                          'components': [{'id': iss_desc.component}],
-                          'summary': iss_desc.summary(),
-                          'description': iss_desc.description(),
-                          'issuetype': {'name': 'WorkItem'},
-                          'fixVersions': [{'name': iss_desc.fixVersion}],
-                          'duedate': duedate}
-
-            if iss_desc.reporter:
-                issue_dict['reporter'] = {'name': iss_desc.reporter}
-
-            issue = self.jira.create_issue(fields=issue_dict)
-
-            if iss_desc.reporter:
-                self.jira.remove_watcher(issue, 'mev')
-
-            if iss_desc.assignee:
-                self.jira.assign_issue(issue, iss_desc.assignee)
-
-            if len(iss_desc.watchers):
-                for watcher in iss_desc.watchers:
-                    self.jira.add_watcher(issue, watcher)
-
-            iss_desc.issue = issue
+            issue = self.create(iss_desc)
             print('Created:', issue, issue.fields.summary)
         for iss_desc in self.task.issues:
-            for _iss_desc in iss_desc.outwards:
-                self.jira.create_issue_link('relates to', iss_desc.issue, _iss_desc.issue)
+            self.link(iss_desc)
 
     def monitor(self):
         print('--> MONITOR')
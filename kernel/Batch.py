@@ -0,0 +1,22 @@
+from collections import OrderedDict
+
+
+class Batch:
+    """Plans of several sprints and actions built in one process and deployed as one task."""
+    def __init__(self, sprints, actions, factories, deadline=None):
+        unknown = [action for action in actions if action not in factories]
+        if unknown:
+            raise ValueError('unknown actions: {}'.format(', '.join(unknown)))
+        self.plans = OrderedDict()
+        for sprint in sprints:
+            for action in actions:
+                self.plans[(sprint, action)] = factories[action](sprint, deadline)
+        self.issues = [issue for plan in self.plans.values() for issue in plan.issues]
+
+    def __repr__(self):
+        return ', '.join('{} {}: {} issues'.format(action, sprint, len(plan.issues))
+                         for (sprint, action), plan in self.plans.items())
+
+
+if __name__ == "__main__":
+    pass
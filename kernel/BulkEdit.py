@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from kernel import tool_settings
+from kernel.Jira import JIRA
+from kernel.RateLimiter import RateLimiter
+from kernel.SingleFlight import SingleFlight
+
+
+class BulkEdit:
+    """Moves the fixVersion of the issues a JQL selects and transitions them, in bulk."""
+    fields = 'summary,project,issuetype,status,fixVersions'
+    batchSize = 100
+
+    def __init__(self, jql, move=None, transition=None, concurrency=8, rate=None, trackers=None, dry_run=False):
+        if not move and not transition:
+            raise ValueError('nothing to do: neither a fixVersion to move nor a transition')
+        self.jira = JIRA()
+        self.jql = jql
+        self.move = move
+        self.transition = transition
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter(rate, burst=self.concurrency)
+        self.trackers = trackers or dict()
+        self.dryRun = dry_run
+        operation = json.dumps([jql, move, transition])
+        self.journal = os.path.join(tool_settings.storeHome, 'FIWARE.bulkedit.{}.jsonl'
+                                    .format(hashlib.sha256(operation.encode()).hexdigest()[:16]))
+        self._transitions = dict()
+        self._lookups = SingleFlight()
+
+    def done(self):
+        """The keys of the issues done by earlier runs, and the changes made to those that failed."""
+        done, made = set(), dict()
+        if os.path.exists(self.journal):
+            with open(self.journal) as file:
+                for line in file:
+                    record = json.loads(line)
+                    if record['status'] == 'error':
+                        made.setdefault(record['key'], set()).update(record.get('changes', []))
+                    else:
+                        done.add(record['key'])
+                        made.pop(record['key'], None)
+        return done, made
+
+    def _transitionId(self, issue):
+        fields = issue['fields']
+        group = (fields['project']['key'], fields['issuetype']['id'], fields['status']['id'])
+        if group not in self._transitions:
+            # the issues of a group arriving together share one lookup
+            self._transitions[group] = self._lookups.do(group, self._lookup, issue['key'])
+        return self._transitions[group]
+
+    def _lookup(self, key):
+        self.limiter.acquire()
+        return self.jira.findTransition(key, (self.transition,))
+
+    def edit(self, issue, made=()):
+        """Edits an issue, leaving out the changes made already by an earlier run."""
+        record = {'command': 'bulkedit', 'key': issue['key'], 'project': issue['fields']['project']['key'],
+                  'summary': issue['fields']['summary']}
+        changes = sorted(made)
+        try:
+            versions = [version['name'] for version in issue['fields'].get('fixVersions') or []]
+            if self.move and self.move[0] in versions and 'fixVersion' not in changes:
+                update = [{'remove': {'name': self.move[0]}}]
+                if self.move[1] not in versions:
+                    update.append({'add': {'name': self.move[1]}})
+                if not self.dryRun:
+                    self.limiter.acquire()
+                    self.jira.editIssue(issue['key'], {'fixVersions': update})
+                changes.append('fixVersion')
+            if self.transition and 'transition' not in changes:
+                transition_id = self._transitionId(issue)
+                if transition_id is None:
+                    raise ValueError('no {} transition from {}'.format(self.transition,
+                                                                       issue['fields']['status']['name']))
+                if not self.dryRun:
+                    self.limiter.acquire()
+                    self.jira.transitionIssue(issue['key'], transition_id)
+                changes.append('transition')
+        except Exception as e:
+            record.update(status='error', error='{}: {}'.format(type(e).__name__, e), changes=changes)
+        else:
+            record.update(status='unchanged' if not changes else 'dry-run' if self.dryRun else 'edited',
+                          changes=changes)
+        return record
+
+    def run(self, emit, restart=False):
+        """Edits the selected issues, emitting one record per issue and one per tracker; returns the failures."""
+        if restart and not self.dryRun and os.path.exists(self.journal):
+            os.remove(self.journal)
+        done, made = (set(), dict()) if restart else self.done()
+        issues = self.jira.getQuery(self.jql, BulkEdit.fields, validateQuery='warn')
+        selected = set(issue['key'] for issue in issues)
+        retry = [key for key in made if key not in selected]
+        if retry:
+            # failed after their fixVersion was moved, the JQL does not select them anymore
+            found, _ = self.jira.getIssues(retry, BulkEdit.fields)
+            issues += [found[key] for key in retry if key in found]
+        pending = [issue for issue in issues if issue['key'] not in done]
+
+        trackers = OrderedDict()
+        for issue in issues:
+            project = issue['fields']['project']['key']
+            summary = trackers.setdefault(project, {'command': 'bulkedit', 'project': project,
+                                                    'tracker': self.trackers.get(project, project),
+                                                    'selected': 0, 'resumed': 0, 'unchanged': 0, 'failed': 0,
+                                                    'dry-run' if self.dryRun else 'edited': 0})
+            summary['selected'] += 1
+            if issue['key'] in done:
+                summary['resumed'] += 1
+
+        failed = 0
+        # a dry run leaves the journal as it is
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor, \
+                open(os.devnull if self.dryRun else self.journal, 'a') as journal:
+            for k in range(0, len(pending), BulkEdit.batchSize):
+                batch = pending[k:k + BulkEdit.batchSize]
+                for record in executor.map(self.edit, batch, [made.get(issue['key'], ()) for issue in batch]):
+                    emit(record)
+                    status = record['status']
+                    trackers[record['project']]['failed' if status == 'error' else status] += 1
+                    failed += status == 'error'
+                    journal.write(json.dumps({'key': record['key'], 'status': status,
+                                              'changes': record['changes']}) + '\n')
+                journal.flush()
+
+        if not failed and not self.dryRun:
+            os.remove(self.journal)
+        for summary in trackers.values():
+            emit(summary)
+        return failed
+
+
+if __name__ == "__main__":
+    pass
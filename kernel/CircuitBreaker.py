@@ -0,0 +1,76 @@
+import sys
+import time
+import threading
+import requests
+from kernel.Transport import ConnectionToJIRA
+
+
+class CircuitOpen(ConnectionToJIRA):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint that keeps failing."""
+    threshold = 3
+    cooldown = 30
+    # errors telling the endpoint is failing: transport errors, and 5xx raised as ConnectionToJIRA
+    errors = (requests.RequestException, ConnectionToJIRA)
+
+    def __init__(self, name, threshold=None, cooldown=None):
+        self.name = name
+        self.threshold = threshold or CircuitBreaker.threshold
+        self.cooldown = cooldown or CircuitBreaker.cooldown
+        self.failures = 0
+        self.openedAt = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.openedAt is None:
+            return 'closed'
+        return 'half-open' if time.time() - self.openedAt >= self.cooldown else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.openedAt is None:
+                return True
+            if self._trial or time.time() - self.openedAt < self.cooldown:
+                return False
+            self._trial = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.openedAt = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                if self.openedAt is None:
+                    print('Jira {} endpoint failing, calls fail fast for {}s'.format(self.name, self.cooldown),
+                          file=sys.stderr)
+                self.openedAt = time.time()
+                self._trial = False
+
+    def call(self, func, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpen('circuit open, failing fast')
+        try:
+            result = func(*args, **kwargs)
+        except CircuitBreaker.errors:
+            self.failure()
+            raise
+        except Exception:
+            # the endpoint answered, even if the answer could not be used
+            self.success()
+            raise
+        self.success()
+        return result
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,301 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from itertools import chain
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from kernel.Batch import Batch
+from kernel.PlanArtifact import PlanArtifact
+from kernel.PlanCache import PlanCache
+from kernel.Offline import Offline
+
+commands = ('print', 'export', 'deploy', 'monitor', 'diff', 'search', 'clean', 'rollover', 'bulkedit')
+
+
+def parser(prog, actions):
+    _parser = argparse.ArgumentParser(
+        prog=prog, description='Print, export, deploy, monitor, diff, search or clean the sprint backlog issues '
+                               'without the menu, roll the unresolved issues of a sprint over to the next one, or '
+                               'bulk edit their fixVersion and status. '
+                               'Every issue is written as one JSON line on stdout, followed by a summary line; '
+                               'the exit status is 1 if any issue failed.')
+    _parser.add_argument('command', choices=commands)
+    _parser.add_argument('--sprint', help="a sprint '6.1.1', a range '6.1.1:6.2.3', a release '6.1' or a comma "
+                                          "separated list of them (default: the current sprint)")
+    _parser.add_argument('--action', default=','.join(actions),
+                         help='comma separated actions among {} (default: all)'.format(', '.join(actions)))
+    _parser.add_argument('--deadline', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                         help='deadline YYYY-MM-DD of every plan (default: the one of each sprint)')
+    _parser.add_argument('--concurrency', type=int, default=1, help='issues handled at the same time')
+    _parser.add_argument('--dry-run', action='store_true', help='do not create, edit nor delete anything in Jira')
+    _parser.add_argument('--description', action='store_true', help='print also the descriptions')
+    _parser.add_argument('--plan', help='plan artifact to work on instead of building the plans, '
+                                        'without loading the configuration')
+    _parser.add_argument('--output', help='file the export command writes the plan artifact to')
+    _parser.add_argument('--project', help='comma separated projects the rollover or bulkedit is limited to '
+                                           '(default: all, the chapter trackers for bulkedit)')
+    _parser.add_argument('--jql', help='issues the bulkedit command works on (default: the unresolved issues '
+                                       'of the sprint in the trackers)')
+    _parser.add_argument('--move', action='store_true', help='bulkedit: move the fixVersion from the sprint '
+                                                             'to the next one')
+    _parser.add_argument('--transition', help='bulkedit: transition to apply, e.g. Close')
+    _parser.add_argument('--rate', type=float, help='bulkedit: most requests per second (default: rate_limit '
+                                                    'in settings.xml, else unlimited)')
+    _parser.add_argument('--restart', action='store_true', help='bulkedit: ignore the journal of an earlier run')
+    _parser.add_argument('--offline', action='store_true', help='send nothing to Jira: build the plans from '
+                                                                'site_config and the copies in store/ only '
+                                                                '(also FIWARE_OFFLINE=1)')
+    _parser.add_argument('--rebuild', action='store_true', help='build the plans again instead of reading them '
+                                                                'from the plan cache in store/')
+    return _parser
+
+
+class Runner:
+    """Runs a command over every issue of a task, writing one JSON line per issue with its timing."""
+    def __init__(self, deployer, concurrency=1, dry_run=False, description=False, out=None):
+        self.deployer = deployer
+        self.concurrency = max(1, concurrency)
+        self.dryRun = dry_run
+        self.description = description
+        self.out = out or sys.stdout
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self.out.write(line + '\n')
+            self.out.flush()
+
+    def each(self, command, func, issues):
+        def run(iss_desc):
+            record = {'command': command, 'sprint': iss_desc.sprint, 'action': iss_desc.action,
+                      'summary': iss_desc.summary()}
+            start = time.perf_counter()
+            try:
+                record.update(func(iss_desc))
+            except Exception as e:
+                record.update(status='error', error='{}: {}'.format(type(e).__name__, e))
+            record['elapsed'] = round(time.perf_counter() - start, 4)
+            if record.get('status') == 'error':
+                with self._lock:
+                    self.failed += 1
+            self.emit(record)
+
+        if self.concurrency == 1:
+            for iss_desc in issues:
+                run(iss_desc)
+        else:
+            # a bounded window of issues in flight, so that issues streamed from an artifact are not all read at once
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                pending = set()
+                for iss_desc in issues:
+                    if len(pending) >= 4 * self.concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    pending.add(executor.submit(run, iss_desc))
+                wait(pending)
+
+    @staticmethod
+    def key(iss_desc):
+        return iss_desc.issue.key if iss_desc.issue is not None else None
+
+    def print(self, iss_desc):
+        record = {'status': 'planned', 'project': iss_desc.project, 'component': iss_desc.component,
+                  'deadline': iss_desc.deadline, 'assignee': iss_desc.assignee,
+                  'inwards': [link.summary() for link in iss_desc.inwards],
+                  'outwards': [link.summary() for link in iss_desc.outwards]}
+        if self.description:
+            record['description'] = iss_desc.description()
+        return record
+
+    def deploy(self, iss_desc):
+        if self.dryRun:
+            return {'status': 'dry-run', 'fields': self.deployer.fields(iss_desc)}
+        issue = self.deployer.create(iss_desc)
+        return {'status': 'adopted' if issue.key in self.deployer.adopted else 'created', 'key': issue.key}
+
+    def link(self, iss_desc):
+        if self.dryRun:
+            return {'status': 'dry-run', 'links': len(iss_desc.outwards)}
+        if iss_desc.issue is None or any(link.issue is None for link in iss_desc.outwards):
+            return {'status': 'error', 'error': 'issue or linked issue not created'}
+        self.deployer.link(iss_desc)
+        return {'status': 'linked', 'key': self.key(iss_desc), 'links': len(iss_desc.outwards)}
+
+    def monitor(self, iss_desc):
+        issue = self.deployer.find(iss_desc)
+        if issue is None:
+            return {'status': 'missing'}
+        return {'status': 'found', 'key': issue.key, 'state': str(issue.fields.status)}
+
+    def diff(self, iss_desc):
+        issue = self.deployer.find(iss_desc)
+        if issue is None:
+            return {'status': 'missing'}
+        planned = self.deployer.fields(iss_desc)
+        current = {'summary': issue.fields.summary,
+                   'description': issue.fields.description,
+                   'duedate': issue.fields.duedate,
+                   'fixVersions': [{'name': version.name} for version in issue.fields.fixVersions],
+                   'components': [{'id': component.id} for component in issue.fields.components]}
+        changed = sorted(name for name in current if current[name] != planned[name])
+        assignee = issue.fields.assignee.name if issue.fields.assignee else None
+        if iss_desc.assignee and assignee != iss_desc.assignee:
+            changed.append('assignee')
+        if changed:
+            return {'status': 'changed', 'key': issue.key, 'fields': changed}
+        return {'status': 'same', 'key': issue.key}
+
+    def search(self, iss_desc):
+        query = 'component = {} and summary ~ {}'.format(iss_desc.component, iss_desc.action)
+        return {'status': 'searched', 'matches': [issue.fields.summary for issue in
+                                                  self.deployer.jira.search_issues(query)]}
+
+    def clean(self, iss_desc):
+        issue = self.deployer.find(iss_desc)
+        if issue is None:
+            return {'status': 'missing'}
+        if not self.dryRun:
+            issue.delete()
+        return {'status': 'dry-run' if self.dryRun else 'deleted', 'key': issue.key}
+
+    def run(self, command, issues, links=None):
+        """links, when given, is a lazy iterable of the issues to link once all of them are deployed."""
+        self.each(command, getattr(self, command), issues)
+        if command == 'deploy':
+            if links is None:
+                links = [iss_desc for iss_desc in issues if iss_desc.outwards]
+            self.each('link', self.link, links)
+
+
+def rollover(args, runner):
+    """Clones the unresolved issues of a sprint into the next one and closes them."""
+    from kconfig import agileCalendar
+    from kernel.Rollover import Rollover
+
+    start = time.perf_counter()
+    try:
+        sprint = args.sprint or agileCalendar.current_sprint
+        next_sprint = agileCalendar.get_next_sprint(sprint)
+        projects = args.project.split(',') if args.project else None
+        failed = Rollover(sprint, next_sprint, projects, args.concurrency, args.dry_run).run(runner.emit)
+    except Exception as e:
+        runner.emit({'command': args.command, 'status': 'error', 'error': '{}: {}'.format(type(e).__name__, e)})
+        return 2
+    runner.emit({'command': args.command, 'sprints': [sprint, next_sprint], 'status': 'failed' if failed else 'done',
+                 'failed': failed, 'elapsed': round(time.perf_counter() - start, 4)})
+    return 1 if failed else 0
+
+
+def bulkedit(args, runner):
+    """Moves the fixVersion of the issues of the trackers and transitions them."""
+    import kconfig
+    from kconfig.TTrackerBook import TrackerBook
+    from kernel import tool_settings
+    from kernel.BulkEdit import BulkEdit
+
+    start = time.perf_counter()
+    try:
+        sprint = args.sprint or kconfig.agileCalendar.current_sprint
+        move = ('Sprint {}'.format(sprint), 'Sprint {}'.format(kconfig.agileCalendar.get_next_sprint(sprint))) \
+            if args.move else None
+        projects = args.project.split(',') if args.project else list(kconfig.chaptersBook.chaptersByKey)
+        jql = args.jql or 'project in ({}) and fixVersion = "Sprint {}" and resolution = Unresolved order by key'\
+            .format(', '.join(projects), sprint)
+        trackers = {key: tracker.name for key, tracker in TrackerBook().trackersByKey.items()}
+        rate = args.rate if args.rate is not None else tool_settings.transport.get('rate_limit')
+        engine = BulkEdit(jql, move, args.transition, args.concurrency, rate, trackers, args.dry_run)
+        failed = engine.run(runner.emit, args.restart)
+    except Exception as e:
+        runner.emit({'command': args.command, 'status': 'error', 'error': '{}: {}'.format(type(e).__name__, e)})
+        return 2
+    runner.emit({'command': args.command, 'jql': jql, 'status': 'failed' if failed else 'done', 'failed': failed,
+                 'throttled': round(engine.limiter.waited, 4), 'elapsed': round(time.perf_counter() - start, 4)})
+    return 1 if failed else 0
+
+
+def main(argv, factories, prog=None):
+    """Headless entry point of the scripts; returns the exit status."""
+    from kernel.BacklogDeployer import BacklogDeployer
+
+    args = parser(prog, list(factories)).parse_args(argv)
+    runner = Runner(None, args.concurrency, args.dry_run, args.description)
+    if args.offline:
+        Offline.enable()
+    if Offline.enabled and not (args.command in ('print', 'export') or args.command == 'deploy' and args.dry_run):
+        runner.emit({'command': args.command, 'status': 'error',
+                     'error': 'offline: only print, export and deploy --dry-run work without Jira'})
+        return 2
+    if args.command == 'rollover':
+        return rollover(args, runner)
+    if args.command == 'bulkedit':
+        return bulkedit(args, runner)
+    summary = {'command': args.command}
+    stale = []
+    start = time.perf_counter()
+    try:
+        if args.command == 'export' and not args.output:
+            raise ValueError('export needs --output')
+        if args.plan:
+            if args.command in ('export', 'search'):
+                raise ValueError('{} works on the configuration, not on a plan artifact'.format(args.command))
+            artifact = PlanArtifact(args.plan)
+            artifact.verify()
+            sprints, size = artifact.header['sprints'], artifact.header['nodes']
+            projects = artifact.header.get('projects', [])
+            stale = artifact.header.get('stale', [])
+            issues, links = artifact.issues(), artifact.links()
+        else:
+            from kconfig import agileCalendar
+            sprints = agileCalendar.selectSprints(args.sprint) if args.sprint else [agileCalendar.current_sprint]
+            actions = args.action.split(',')
+            if args.command == 'export':
+                task = Batch(sprints, actions, factories, args.deadline)
+                size = len(task.issues)
+            else:
+                unknown = [action for action in actions if action not in factories]
+                if unknown:
+                    raise ValueError('unknown actions: {}'.format(', '.join(unknown)))
+                cache = PlanCache(factories)
+                artifacts = [cache.get(sprint, action, args.deadline, args.rebuild)
+                             for sprint in sprints for action in actions]
+                size = sum(artifact.header['nodes'] for artifact in artifacts)
+                projects = set(chain.from_iterable(artifact.header.get('projects', []) for artifact in artifacts))
+                stale = list(chain.from_iterable(artifact.header.get('stale', []) for artifact in artifacts))
+                issues = chain.from_iterable(artifact.issues() for artifact in artifacts)
+                links = chain.from_iterable(artifact.links() for artifact in artifacts)
+                summary['cached'] = cache.hits
+        if args.command == 'export':
+            artifact = PlanArtifact.export(task, args.output, Offline.stale())
+        else:
+            runner.deployer = BacklogDeployer(None, description=args.description)
+            if args.command in ('monitor', 'diff', 'clean') or args.command == 'deploy' and not args.dry_run:
+                # one search for the issues already in Jira instead of one per issue
+                runner.deployer.seed(projects, sprints)
+    except Exception as e:
+        runner.emit({'command': args.command, 'status': 'error', 'error': '{}: {}'.format(type(e).__name__, e)})
+        return 2
+    built = time.perf_counter()
+
+    summary.update(sprints=sprints, issues=size)
+    if Offline.enabled:
+        summary['offline'] = True
+    stale = list(dict.fromkeys(Offline.stale() + stale))
+    if stale:
+        # values the plans were built with that may be out of date, e.g. a release date read offline
+        summary['stale'] = stale
+    if args.command == 'export':
+        summary.update(path=args.output, hash=artifact.header['hash'], edges=artifact.header['edges'])
+    else:
+        runner.run(args.command, issues, links)
+    summary.update(status='failed' if runner.failed else 'done', failed=runner.failed,
+                   build=round(built - start, 4), elapsed=round(time.perf_counter() - start, 4))
+    runner.emit(summary)
+    return 1 if runner.failed else 0
+
+
+if __name__ == "__main__":
+    pass
@@ -1,17 +1,16 @@
-import base64
-import certifi
+import time
+import threading
 import requests
-from kconfig import settings
+from collections import OrderedDict
+from kernel.Transport import Transport, ConnectionToJIRA
+from kernel.CircuitBreaker import CircuitBreaker
+from kernel.SingleFlight import SingleFlight
 
 __author__ = "Manuel Escriche <mev@tid.es>"
 
 
-class ConnectionToJIRA(Exception):
-    pass
-
-
 class Connector:
-
+    """Jira REST calls of the configuration books."""
     url_api = {
         'session': '/rest/auth/1/session',
         'project': '/rest/api/latest/project',
@@ -21,6 +20,13 @@ class Connector:
     }
     instance = None
     verify = False
+    # seconds a project document answers both tracker() and trackerLeader()
+    projectTtl = 60
+    # last good answers kept, and for how long they may stand in for a failing endpoint
+    answersSize = 256
+    answersTtl = 3600
+    # endpoints whose answers are too big and too varied to keep
+    uncached = ('search',)
 
     @classmethod
     def getInstance(cls):
@@ -32,109 +38,84 @@ class Connector:
     def __init__(self):
         if Connector.instance is not None:
             raise ValueError("An instantiation already exists!")
+        self.breakers = {endpoint: CircuitBreaker(endpoint) for endpoint in ('component', 'project', 'search', 'user')}
+        self.flights = SingleFlight()
+        # last good answers with their time by request, least recently used first, served while failing
+        self._answers = OrderedDict()
+        self._lock = threading.Lock()
         self._connect()
 
     def _connect(self):
-        username = settings.server['JIRA'].username
-        password = settings.server['JIRA'].password
-        auth = '{}:{}'.format(username, password)
-        keyword = base64.b64encode(bytes(auth, 'utf-8'))
-        access_key = str(keyword)[2:-1]
-        headers = {'Content-Type': 'application/json', "Authorization": "Basic {}".format(access_key)}
-        self.root_url = 'https://{}'.format(settings.server['JIRA'].domain)
-        # print(self.root_url)
-        self.session = requests.session()
-
-        # url = '{}{}'.format(self.root_url, Connector.url_api['session'])
-        answer = self.session.get(self.root_url, headers=headers, verify=Connector.verify)
-        if answer.status_code != requests.codes.ok:
-            raise ConnectionToJIRA
-
-        self.session.headers.update({'Content-Type': 'application/json'})
+        transport = Transport.getInstance()
+        self.root_url = transport.root_url
+        self.session = transport.session
+
+    def _fetch(self, url):
+        answer = self.session.get(url, verify=Connector.verify)
+        if answer.status_code >= 500:
+            raise ConnectionToJIRA('{} answered {}'.format(url, answer.status_code))
+        return answer.ok, answer.json()
+
+    def _answer(self, url, fresh):
+        """The answer kept for a request if younger than fresh seconds."""
+        with self._lock:
+            if url not in self._answers:
+                return None
+            timestamp, data = self._answers[url]
+            if time.time() - timestamp >= min(fresh, Connector.answersTtl):
+                return None
+            self._answers.move_to_end(url)
+            return data
+
+    def _keep(self, url, data):
+        with self._lock:
+            self._answers[url] = (time.time(), data)
+            self._answers.move_to_end(url)
+            while len(self._answers) > Connector.answersSize:
+                self._answers.popitem(last=False)
+
+    def _get(self, endpoint, url, params=None, fresh=0):
+        url = requests.Request('GET', url, params=params).prepare().url
+        data = self._answer(url, fresh)
+        if data is not None:
+            return data
+        try:
+            ok, data = self.flights.do(url, self.breakers[endpoint].call, self._fetch, url)
+        except (requests.RequestException, ConnectionToJIRA, ValueError) as e:
+            data = self._answer(url, Connector.answersTtl)
+            if data is not None:
+                return data
+            raise ConnectionToJIRA('{} {}'.format(endpoint, e)) from e
+        if ok and endpoint not in Connector.uncached:
+            self._keep(url, data)
+        return data
 
     def component(self, cmp_id):
-        # print('component')
         url = '{}{}{}'.format(self.root_url, Connector.url_api['component'], cmp_id)
-        try:
-            answer = self.session.get(url, verify=Connector.verify)
-        except Exception:
-            try:
-                self._connect()
-                answer = self.session.get(url, verify=Connector.verify)
-            except Exception:
-                raise ConnectionToJIRA
-
-        data = answer.json()
-        return data
+        return self._get('component', url)
 
     def componentLeader(self, cmp_id):
         url = '{}{}{}'.format(self.root_url, Connector.url_api['component'], cmp_id)
         try:
-            answer = self.session.get(url, verify=Connector.verify)
-        except Exception:
+            data = self._get('component', url)
+        except ConnectionToJIRA:
             return 'Unknown'
-
-        data = answer.json()
         return data['realAssignee']['displayName']
 
     def tracker(self, tracker_id):
-        # print('tracker')
-        url = '{}{}{}'.format(self.root_url, Connector.url_api['project'], tracker_id)
-        try:
-            answer = self.session.get(url, verify=Connector.verify)
-        except Exception:
-            try:
-                self._connect()
-                answer = self.session.get(url, verify=Connector.verify)
-            except Exception:
-                raise ConnectionToJIRA
-        # print(answer.url)
-        data = answer.json()
-        return data
+        url = '{}{}/{}'.format(self.root_url, Connector.url_api['project'], tracker_id)
+        return self._get('project', url, fresh=Connector.projectTtl)
 
     def trackerLeader(self, tracker_id):
-        url = '{}{}/{}?lead'.format(self.root_url, Connector.url_api['project'], tracker_id)
-        try:
-            answer = self.session.get(url, verify=Connector.verify)
-        except Exception:
-            try:
-                self._connect()
-                answer = self.session.get(url, verify=Connector.verify)
-            except Exception:
-                raise ConnectionToJIRA
-        data = answer.json()
-        return data['lead']['displayName']
+        return self.tracker(tracker_id)['lead']['displayName']
 
     def search(self, params):
-        # print('search')
         url = '{}{}'.format(self.root_url, Connector.url_api['search'])
-        # print(url)
-        try:
-            answer = self.session.get(url, params=params, verify=Connector.verify)
-        except Exception:
-            try:
-                self._connect()
-                answer = self.session.get(url, params=params, verify=Connector.verify)
-            except Exception:
-                raise ConnectionToJIRA
-        # print(answer.url)
-        data = answer.json()
-        return data
+        return self._get('search', url, params)
 
     def displayName(self, username):
         url = '{}{}'.format(self.root_url, Connector.url_api['user'])
-        params = {'username': username}
-        for n in range(0, 1):
-            try:
-                answer = self.session.get(url, params=params, verify=Connector.verify)
-            except Exception:
-                if n:
-                    raise ConnectionToJIRA
-            else:
-                break
-
-        # print(answer.url)
-        data = answer.json()
+        data = self._get('user', url, {'username': username})
         return data['displayName']
 
 
@@ -151,22 +132,9 @@ class JIRA:
     }
 
     def __init__(self):
-        username = settings.server['JIRA'].username
-        password = settings.server['JIRA'].password
-        auth = '{}:{}'.format(username, password)
-        keyword = base64.b64encode(bytes(auth, 'utf-8'))
-        access_key = str(keyword)[2:-1]
-        headers = {'Content-Type': 'application/json', "Authorization": "Basic {}".format(access_key)}
-        self.root_url = 'https://{}'.format(settings.server['JIRA'].domain)
-        # print(self.root_url)
-        self.session = requests.session()
-
-        # url = '{}{}'.format(self.root_url, JIRA.url_api['session'])
-        answer = self.session.get(self.root_url, headers=headers, verify=JIRA.verify)
-        if answer.status_code != requests.codes.ok:
-            raise ConnectionToJIRA
-
-        self.session.headers.update({'Content-Type': 'application/json'})
+        transport = Transport.getInstance()
+        self.root_url = transport.root_url
+        self.session = transport.session
 
     def search(self, params):
         url = '{}{}'.format(self.root_url, JIRA.url_api['search'])
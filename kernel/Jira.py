@@ -1,14 +1,11 @@
-import base64
-import requests
-from kconfig import settings
+from urllib.parse import quote_plus
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from kernel.Transport import Transport, ConnectionToJIRA
 
 __author__ = 'Manuel Escriche'
 
 
-class ConnectionToJIRA(Exception):
-    pass
-
-
 class JIRA:
     _fields = '*navigable'
 
@@ -18,33 +15,23 @@ class JIRA:
 
     verify = False
 
+    # longest search url sent, and most keys asked for in one search
+    urlLimit = 6000
+    keysPerQuery = 500
+
     url_api = {
         'project': '/rest/api/latest/project',
         'component': '/rest/api/latest/component/',
         'search': '/rest/api/latest/search',
-        'issue': '/rest/api/latest/issue'
+        'issue': '/rest/api/latest/issue',
+        'bulk': '/rest/api/latest/issue/bulk',
+        'issueLink': '/rest/api/latest/issueLink'
     }
 
     def __init__(self):
-        username = settings.server['JIRA'].username
-        password = settings.server['JIRA'].password
-        auth = '{}:{}'.format(username, password)
-        keyword = base64.b64encode(bytes(auth, 'utf-8'))
-        access_key = str(keyword)[2:-1]
-        headers = {'Content-Type': 'application/json', "Authorization": "Basic {}".format(access_key)}
-        self.root_url = 'https://{}'.format(settings.server['JIRA'].domain)
-        # print(self.root_url)
-        self.session = requests.session()
-
-        # url = '{}{}'.format(self.root_url, JIRA.url_api['session'])
-        try:
-            answer = self.session.get(self.root_url, headers=headers, verify=JIRA.verify)
-        except ConnectionError:
-            raise Exception
-        if answer.status_code != requests.codes.ok:
-            raise ConnectionToJIRA
-
-        self.session.headers.update({'Content-Type': 'application/json'})
+        transport = Transport.getInstance()
+        self.root_url = transport.root_url
+        self.session = transport.session
 
     def search(self, params):
         url = '{}{}'.format(self.root_url, JIRA.url_api['search'])
@@ -101,11 +88,12 @@ class JIRA:
 
         return data['issues']
 
-    def getQuery(self, jql):
+    def getQuery(self, jql, fields=None, **params):
         start_at = 0
-        payload = {'fields': JIRA.fields,
+        payload = {'fields': fields or JIRA.fields,
                    'maxResults': 1000, 'startAt': start_at,
                    'jql': jql}
+        payload.update(params)
         try:
             data = self.search(payload)
         except Exception:
@@ -132,3 +120,83 @@ class JIRA:
         # print(answer.url)
         data = answer.json()
         return data
+
+    def getIssues(self, keys, fields=None, workers=4):
+        """Fetch issues by key with a few searches: the issues by key and the keys not found."""
+        keys = list(OrderedDict.fromkeys(keys))
+        fields = fields or JIRA.fields
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(lambda jql: self.getQuery(jql, fields, validateQuery='warn'),
+                                  self._keyQueries(keys, fields))
+            issues = {issue['key']: issue for chunk in chunks for issue in chunk}
+        missing = [key for key in keys if key not in issues]
+        return issues, missing
+
+    def _send(self, method, url, payload, accept=()):
+        try:
+            answer = self.session.request(method, url, json=payload, verify=JIRA.verify)
+        except Exception:
+            raise ConnectionToJIRA
+        if not answer.ok and answer.status_code not in accept:
+            raise ConnectionToJIRA('{} answered {}: {}'.format(url, answer.status_code, answer.text[:200]))
+        return answer.json() if answer.content else None
+
+    def _post(self, url, payload, accept=()):
+        return self._send('POST', url, payload, accept)
+
+    def createIssues(self, fields_list):
+        """Create many issues with one request: the issues in order, None where refused, and the errors."""
+        url = '{}{}'.format(self.root_url, JIRA.url_api['bulk'])
+        # 400 when none was created, the errors are in the answer all the same
+        data = self._post(url, {'issueUpdates': [{'fields': fields} for fields in fields_list]}, accept=(400,))
+        errors = {error['failedElementNumber']: error.get('elementErrors', error)
+                  for error in data.get('errors', [])}
+        created = iter(data.get('issues', []))
+        return [None if k in errors else next(created, None) for k in range(len(fields_list))], errors
+
+    def linkIssues(self, link_type, inward, outward):
+        url = '{}{}'.format(self.root_url, JIRA.url_api['issueLink'])
+        return self._post(url, {'type': {'name': link_type},
+                                'inwardIssue': {'key': inward}, 'outwardIssue': {'key': outward}})
+
+    def editIssue(self, key, update):
+        """Apply field operations to an issue, e.g. {'fixVersions': [{'remove': {'name': 'Sprint 6.1.1'}}]}."""
+        url = '{}{}/{}'.format(self.root_url, JIRA.url_api['issue'], key)
+        return self._send('PUT', url, {'update': update})
+
+    def getTransitions(self, key):
+        url = '{}{}/{}/transitions'.format(self.root_url, JIRA.url_api['issue'], key)
+        try:
+            answer = self.session.get(url, verify=JIRA.verify)
+        except Exception:
+            raise ConnectionToJIRA
+        return answer.json().get('transitions', [])
+
+    def findTransition(self, key, names):
+        """The id of the first of the transition names available to an issue, None if there is none."""
+        available = {transition['name'].lower(): transition['id'] for transition in self.getTransitions(key)}
+        for name in names:
+            if name.lower() in available:
+                return available[name.lower()]
+        return None
+
+    def transitionIssue(self, key, transition_id, fields=None):
+        url = '{}{}/{}/transitions'.format(self.root_url, JIRA.url_api['issue'], key)
+        payload = {'transition': {'id': transition_id}}
+        if fields:
+            payload['fields'] = fields
+        return self._post(url, payload)
+
+    def _keyQueries(self, keys, fields):
+        # room left for the keys once the rest of the search url is written
+        room = JIRA.urlLimit - len(self.root_url) - len(JIRA.url_api['search']) - len(quote_plus(fields)) - 100
+        chunk, size = [], 0
+        for key in keys:
+            length = len(quote_plus(key)) + len(quote_plus(', '))
+            if chunk and (size + length > room or len(chunk) == JIRA.keysPerQuery):
+                yield 'key in ({})'.format(', '.join(chunk))
+                chunk, size = [], 0
+            chunk.append(key)
+            size += length
+        if chunk:
+            yield 'key in ({})'.format(', '.join(chunk))
@@ -0,0 +1,40 @@
+import os
+import threading
+
+
+class Offline:
+    """Offline mode: nothing is sent to Jira and the values read from store/ are flagged."""
+    enabled = os.environ.get('FIWARE_OFFLINE', '').lower() not in ('', '0', 'no', 'false')
+    _flags = []
+    _lock = threading.Lock()
+
+    @classmethod
+    def enable(cls, enabled=True):
+        cls.enabled = enabled
+
+    @classmethod
+    def flag(cls, value, reason):
+        with cls._lock:
+            cls._flags.append('{}: {}'.format(value, reason))
+
+    @classmethod
+    def mark(cls):
+        return len(cls._flags)
+
+    @classmethod
+    def stale(cls, since=0):
+        """The flags raised since a mark, each once."""
+        with cls._lock:
+            return list(dict.fromkeys(cls._flags[since:]))
+
+    @staticmethod
+    def age(seconds):
+        if seconds < 3600:
+            return '{:.0f} minutes old'.format(seconds / 60)
+        if seconds < 2 * 86400:
+            return '{:.1f} hours old'.format(seconds / 3600)
+        return '{:.1f} days old'.format(seconds / 86400)
+
+
+if __name__ == "__main__":
+    pass
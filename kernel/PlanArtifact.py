@@ -0,0 +1,173 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from collections import namedtuple, OrderedDict
+
+Deployed = namedtuple('Deployed', ('key',))
+Node = namedtuple('Node', ('id', 'sprint', 'action', 'summary'))
+
+
+class PlannedIssue:
+    """An issue of a plan read back from its artifact."""
+    __slots__ = ('id', 'project', 'component', 'sprint', 'action', 'fixVersion', 'deadline', 'assignee',
+                 'watchers', 'reporter', 'inwards', 'outwards', '_summary', '_description', '_deployed')
+
+    def __init__(self, record, deployed, inwards=(), outwards=()):
+        fields = record['fields']
+        self.id = record['id']
+        self.project = fields['project']['key']
+        self.component = fields['components'][0]['id']
+        self.sprint = record['sprint']
+        self.action = record['action']
+        self.fixVersion = fields['fixVersions'][0]['name']
+        self.deadline = datetime.strptime(fields['duedate'], '%Y-%m-%d').date() if fields['duedate'] else None
+        self.assignee = record['assignee']
+        self.watchers = record['watchers']
+        self.reporter = fields['reporter']['name'] if 'reporter' in fields else None
+        self.inwards = list(inwards)
+        self.outwards = list(outwards)
+        self._summary = fields['summary']
+        self._description = fields['description']
+        self._deployed = deployed
+
+    @property
+    def issue(self):
+        return self._deployed.get(self.id)
+
+    @issue.setter
+    def issue(self, issue):
+        self._deployed[self.id] = Deployed(issue.key)
+
+    def summary(self):
+        return self._summary
+
+    def description(self):
+        return self._description
+
+
+class PlannedLink:
+    """An issue of an artifact as seen from the issues linked to it."""
+    __slots__ = ('node', 'outwards', '_deployed')
+
+    def __init__(self, node, deployed, outwards=()):
+        self.node = node
+        self.outwards = list(outwards)
+        self._deployed = deployed
+
+    @property
+    def issue(self):
+        return self._deployed.get(self.node.id)
+
+    @property
+    def sprint(self):
+        return self.node.sprint
+
+    @property
+    def action(self):
+        return self.node.action
+
+    def summary(self):
+        return self.node.summary
+
+
+class PlanArtifact:
+    """A built plan saved as JSON lines: a header, one line per issue and one per link."""
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+        with open(path) as file:
+            self.header = json.loads(file.readline())
+        if self.header.get('type') != 'plan' or self.header.get('version') != PlanArtifact.version:
+            raise ValueError('{} is not a plan artifact of version {}'.format(path, PlanArtifact.version))
+        self.deployed = dict()
+        self._graph = None
+
+    @staticmethod
+    def export(task, path, stale=None):
+        """Writes the issues of a task to path and returns the artifact; stale lists Offline flags."""
+        from kernel.BacklogDeployer import BacklogDeployer
+
+        index = {id(iss_desc): k for k, iss_desc in enumerate(task.issues)}
+        lines = []
+        for k, iss_desc in enumerate(task.issues):
+            record = {'type': 'node', 'id': k, 'sprint': iss_desc.sprint, 'action': iss_desc.action,
+                      'fields': BacklogDeployer.fields(iss_desc),
+                      'assignee': iss_desc.assignee, 'watchers': iss_desc.watchers}
+            lines.append(json.dumps(record, sort_keys=True, separators=(',', ':')))
+        edges = 0
+        for k, iss_desc in enumerate(task.issues):
+            for link in iss_desc.outwards:
+                lines.append(json.dumps({'type': 'edge', 'from': k, 'to': index[id(link)]},
+                                        sort_keys=True, separators=(',', ':')))
+                edges += 1
+
+        digest = hashlib.sha256()
+        for line in lines:
+            digest.update(line.encode('utf-8') + b'\n')
+        header = {'type': 'plan', 'version': PlanArtifact.version, 'hash': digest.hexdigest(),
+                  'sprints': sorted(set(sprint for sprint, action in task.plans)),
+                  'actions': sorted(set(action for sprint, action in task.plans)),
+                  'projects': sorted(set(iss_desc.project for iss_desc in task.issues)),
+                  'nodes': len(task.issues), 'edges': edges, 'created': datetime.now().isoformat()}
+        if stale:
+            header['stale'] = stale
+
+        with open(path + '.tmp', 'w') as file:
+            file.write(json.dumps(header, sort_keys=True) + '\n')
+            for line in lines:
+                file.write(line + '\n')
+        os.replace(path + '.tmp', path)
+        return PlanArtifact(path)
+
+    def records(self):
+        with open(self.path) as file:
+            file.readline()
+            for line in file:
+                yield json.loads(line)
+
+    def verify(self):
+        """Checks the content hash of the file, reading it line by line."""
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as file:
+            file.readline()
+            for line in file:
+                digest.update(line)
+        if digest.hexdigest() != self.header['hash']:
+            raise ValueError('{} is corrupted: its content does not match its hash'.format(self.path))
+
+    def graph(self):
+        """The summary of every issue, by id, and the ids linked to every issue, inwards and outwards."""
+        if self._graph is None:
+            nodes, inwards, outwards = dict(), dict(), OrderedDict()
+            for record in self.records():
+                if record['type'] == 'node':
+                    nodes[record['id']] = Node(record['id'], record['sprint'], record['action'],
+                                               record['fields']['summary'])
+                else:
+                    outwards.setdefault(record['from'], []).append(record['to'])
+                    inwards.setdefault(record['to'], []).append(record['from'])
+            self._graph = nodes, inwards, outwards
+        return self._graph
+
+    def _link(self, k):
+        return PlannedLink(self.graph()[0][k], self.deployed)
+
+    def issues(self):
+        nodes, inwards, outwards = self.graph()
+        for record in self.records():
+            if record['type'] == 'node':
+                yield PlannedIssue(record, self.deployed,
+                                   [self._link(k) for k in inwards.get(record['id'], [])],
+                                   [self._link(k) for k in outwards.get(record['id'], [])])
+
+    def links(self):
+        """The issues with outward links, as they were written."""
+        nodes, inwards, outwards = self.graph()
+        for k, targets in outwards.items():
+            yield PlannedLink(nodes[k], self.deployed, [self._link(j) for j in targets])
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,138 @@
+import os
+from datetime import timedelta
+from collections import OrderedDict
+from xml.etree import ElementTree as Et
+import kconfig
+from kernel import tool_settings
+
+
+class Level:
+    """One level of a plan: the issue created for every entity of a kind."""
+    __slots__ = ('id', 'kind', 'issue', 'parents', 'link', 'action', 'offset', 'exclude', 'include')
+
+    def __init__(self, level):
+        self.id = level.get('id')
+        self.kind = level.get('kind')
+        self.issue = level.get('issue')
+        self.parents = tuple(Level._split(level.get('parent', '')))
+        self.link = level.get('link', 'both')
+        self.action = level.get('action')
+        self.offset = int(level.get('deadline', 0))
+        self.exclude = [Level._filter(item) for item in level.findall('exclude')]
+        self.include = [Level._filter(item) for item in level.findall('include')]
+
+    @staticmethod
+    def _split(value):
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    @staticmethod
+    def _filter(element):
+        return {key: set(Level._split(value)) for key, value in element.attrib.items()}
+
+    def accepts(self, fields):
+        if any(any(fields(key) in values for key, values in item.items()) for item in self.exclude):
+            return False
+        return all(all(fields(key) in values for key, values in item.items()) for item in self.include)
+
+    def __repr__(self):
+        return '{0.id}: {0.issue} per {0.kind}'.format(self)
+
+
+class PlanRules(dict):
+    """The plans of site_config/PlanRules.xml by name, each an ordered list of levels."""
+    def __init__(self):
+        super().__init__()
+        xmlfile = os.path.join(tool_settings.configHome, 'PlanRules.xml')
+        root = Et.parse(xmlfile).getroot()
+        self.actions = dict()
+        for plan in root.findall('plan'):
+            name = plan.get('name')
+            self.actions[name] = plan.get('action', name)
+            self[name] = [Level(level) for level in plan.findall('level') if level.get('active', 'yes') != 'no']
+
+
+class PlanBuilder:
+    """Builds the issue hierarchy of a plan for a sprint from its rules."""
+    # entity kind: (enclosing kind, entities of the kind within an entity of the enclosing one)
+    kinds = OrderedDict((
+        ('source', (None, None)),
+        ('chapter', ('source', lambda parent: kconfig.chaptersBook.chaptersByName.items())),
+        ('enabler', ('chapter', lambda chapter: chapter.enablers.items())),
+        ('tool', ('chapter', lambda chapter: chapter.tools.items())),
+        ('workgroup', ('source', lambda parent: kconfig.workGroupBook.workingGroupByName.items())),
+        ('group', ('workgroup', lambda workgroup: workgroup.groups.items())),
+        ('lab', ('source', lambda parent: kconfig.labsBookByName.items())),
+        ('node', ('lab', lambda lab: lab.nodes.items())),
+    ))
+    _rules = None
+
+    @classmethod
+    def reload(cls, rules=None):
+        """Swaps in the given plan rules, or parses PlanRules.xml again."""
+        cls._rules = rules if rules is not None else PlanRules()
+
+    def __init__(self, plan, classes):
+        if PlanBuilder._rules is None:
+            PlanBuilder.reload()
+        self.plan = plan
+        self.action = PlanBuilder._rules.actions[plan]
+        self.classes = classes
+        self.levels = OrderedDict((kind, []) for kind in PlanBuilder.kinds)
+        for level in PlanBuilder._rules[plan]:
+            if level.kind not in PlanBuilder.kinds:
+                raise ValueError('{} level {} has unknown kind {}'.format(plan, level.id, level.kind))
+            if level.issue not in classes:
+                raise ValueError('{} level {} has unknown issue {}'.format(plan, level.id, level.issue))
+            self.levels[level.kind].append(level)
+
+        # kinds to walk into from each kind: those with levels, or with levels below them
+        wanted = set()
+        for kind in reversed(PlanBuilder.kinds):
+            if self.levels[kind] or kind in wanted:
+                wanted.add(kind)
+                wanted.add(PlanBuilder.kinds[kind][0])
+        self.children = OrderedDict((kind, [child for child in PlanBuilder.kinds
+                                            if child in wanted and PlanBuilder.kinds[child][0] == kind])
+                                    for kind in PlanBuilder.kinds)
+
+    def build(self, sprint, deadline):
+        issues = []
+        current = dict()
+
+        def visit(kind, entity, names, enclosing):
+            def fields(key):
+                if key == 'name':
+                    return names[-1] if names else None
+                if key in enclosing:
+                    return enclosing[key]
+                return getattr(entity, key, None)
+
+            for level in self.levels[kind]:
+                if not level.accepts(fields):
+                    continue
+                parents = [current.get(parent) for parent in level.parents]
+                if None in parents:
+                    continue
+                _deadline = deadline + timedelta(days=level.offset) if deadline and level.offset else deadline
+                issue = self.classes[level.issue](*names, level.action or self.action, sprint, _deadline)
+                for parent in parents:
+                    parent.outwards.append(issue)
+                    if level.link == 'both':
+                        issue.inwards.append(parent)
+                current[level.id] = issue
+                issues.append(issue)
+
+            for child in self.children[kind]:
+                _enclosing = dict(enclosing, **{kind: names[-1]}) if names else enclosing
+                for name, child_entity in PlanBuilder.kinds[child][1](entity):
+                    visit(child, child_entity, names + (name,), _enclosing)
+
+            for level in self.levels[kind]:
+                current.pop(level.id, None)
+
+        visit('source', None, (), dict())
+        return issues
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,79 @@
+import os
+import sys
+import glob
+import hashlib
+from kernel import tool_settings
+from kernel.Batch import Batch
+from kernel.Offline import Offline
+from kernel.PlanArtifact import PlanArtifact
+
+
+class PlanCache:
+    """Plans built before, kept in store/ as artifacts named after the hash of their inputs."""
+    # the code every plan is built and rendered with, besides the module of its action
+    modules = ('kernel/Batch.py', 'kernel/PlanBuilder.py', 'kernel/Template.py', 'kernel/BacklogDeployer.py',
+               'kernel/PlanArtifact.py', 'kconfig/*.py')
+
+    def __init__(self, factories, directory=None):
+        self.factories = factories
+        self.directory = directory or tool_settings.storeHome
+        self.hits = 0
+        self._inputs = None
+
+    def inputs(self):
+        """The hash of the files every plan depends on, computed once per process."""
+        if self._inputs is None:
+            digest = hashlib.sha256(str(PlanArtifact.version).encode())
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            files = sorted(glob.glob(os.path.join(tool_settings.configHome, '*.xml')))
+            for pattern in PlanCache.modules:
+                files += sorted(glob.glob(os.path.join(root, pattern)))
+            for filename in files:
+                digest.update(os.path.basename(filename).encode() + b'\0')
+                with open(filename, 'rb') as file:
+                    digest.update(file.read())
+            self._inputs = digest.hexdigest()
+        return self._inputs
+
+    def key(self, sprint, action, deadline):
+        factory = self.factories[action]
+        digest = hashlib.sha256(self.inputs().encode())
+        with open(sys.modules[factory.__module__].__file__, 'rb') as file:
+            digest.update(file.read())
+        digest.update('{}\0{}\0{}'.format(sprint, action, deadline.isoformat() if deadline else '').encode())
+        return digest.hexdigest()
+
+    def path(self, sprint, action, key=None):
+        return os.path.join(self.directory, 'FIWARE.plan.{}.{}.{}.jsonl'.format(action, sprint, key or '*'))
+
+    def get(self, sprint, action, deadline=None, rebuild=False):
+        """The artifact of a plan, built and stored unless an artifact of the same inputs is found."""
+        mark = Offline.mark()
+        factory = self.factories[action]
+        if deadline is None and hasattr(factory, 'deadlineOf'):
+            # e.g. a release date: in the key, so a date moved in Jira gives a rebuild
+            deadline = factory.deadlineOf(sprint)
+        key = self.key(sprint, action, deadline)
+        path = self.path(sprint, action, key[:16])
+        if not rebuild and os.path.exists(path):
+            try:
+                artifact = PlanArtifact(path)
+                artifact.verify()
+            except ValueError:
+                pass
+            else:
+                # a plan built offline may hold stale values: online, it is built again
+                if Offline.enabled or 'stale' not in artifact.header:
+                    self.hits += 1
+                    return artifact
+
+        task = Batch([sprint], [action], self.factories, deadline)
+        artifact = PlanArtifact.export(task, path, Offline.stale(mark))
+        for filename in glob.glob(self.path(sprint, action)):
+            if filename != path:
+                os.remove(filename)
+        return artifact
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,27 @@
+import time
+import threading
+
+
+class RateLimiter:
+    """Requests per second shared by every thread of a bulk operation."""
+    def __init__(self, rate=None, burst=1):
+        self.interval = 1 / rate if rate else 0
+        self.burst = max(1, burst)
+        self._next = 0
+        self._lock = threading.Lock()
+        self.waited = 0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now - (self.burst - 1) * self.interval)
+            self._next = slot + self.interval
+            self.waited += max(0, slot - now)
+        if slot > now:
+            time.sleep(slot - now)
+
+
+if __name__ == "__main__":
+    pass
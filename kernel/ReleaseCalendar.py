@@ -0,0 +1,87 @@
+import os
+import json
+import time
+from datetime import datetime
+from kernel import tool_settings
+from kernel.Offline import Offline
+
+
+class ReleaseCalendar:
+    """Release dates of the versions of a Jira project, e.g. 'Sprint 6.1.1' of COR."""
+    ttl = 12 * 3600
+    # a version missing from a copy younger than this is not asked for again
+    revalidate = 60
+    _instances = dict()
+
+    @classmethod
+    def getInstance(cls, project='COR', jira=None):
+        if project not in cls._instances:
+            cls._instances[project] = ReleaseCalendar(project, jira)
+        return cls._instances[project]
+
+    def __init__(self, project='COR', jira=None):
+        self.project = project
+        self._jira = jira
+        self.filename = os.path.join(tool_settings.storeHome, 'FIWARE.{}.versions.json'.format(project))
+        self.timestamp = 0
+        self.versions = dict()
+        self.load()
+
+    @property
+    def jira(self):
+        # the deployer's client, only created when Jira has to be asked
+        if self._jira is None:
+            from kernel.BacklogDeployer import BacklogDeployer
+            self._jira = BacklogDeployer.connect()
+        return self._jira
+
+    @property
+    def age(self):
+        return time.time() - self.timestamp
+
+    @property
+    def stale(self):
+        return self.age > ReleaseCalendar.ttl
+
+    def load(self):
+        try:
+            with open(self.filename) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.timestamp = data['timestamp']
+        self.versions = data['versions']
+
+    def save(self):
+        data = {'timestamp': self.timestamp, 'versions': self.versions}
+        with open(self.filename + '.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(self.filename + '.tmp', self.filename)
+
+    def refresh(self):
+        versions = self.jira.project_versions(self.project)
+        self.versions = {version.name: getattr(version, 'releaseDate', None) for version in versions}
+        self.timestamp = time.time()
+        self.save()
+
+    def releaseDate(self, fix_version):
+        if Offline.enabled:
+            release_date = self.versions.get(fix_version)
+            if not release_date:
+                raise ValueError('{} is not in the release calendar of {} kept in store/, needed offline'
+                                 .format(fix_version, self.project))
+            Offline.flag('release date of {}'.format(fix_version),
+                         'from the release calendar of {}, {}'.format(self.project, Offline.age(self.age)))
+            return datetime.strptime(release_date, '%Y-%m-%d').date()
+
+        if self.stale or (not self.versions.get(fix_version) and self.age > ReleaseCalendar.revalidate):
+            self.refresh()
+
+        release_date = self.versions.get(fix_version)
+        if not release_date:
+            raise ValueError('{} has no release date in project {}'.format(fix_version, self.project))
+        return datetime.strptime(release_date, '%Y-%m-%d').date()
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,176 @@
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from kernel.Jira import JIRA
+
+
+class Rollover:
+    """Clones forward the unresolved issues of a sprint into the next one, and closes them."""
+    fields = 'summary,project,components,issuetype,priority,assignee,labels,description,status'
+    linkType = 'Cloners'
+    # transition names tried in turn to close an original
+    transitions = ('Close', 'Close Issue', 'Closed', 'Done')
+    bulkSize = 50
+
+    def __init__(self, sprint, next_sprint, projects=None, concurrency=8, dry_run=False):
+        self.jira = JIRA()
+        self.sprint = sprint
+        self.nextSprint = next_sprint
+        self.projects = projects
+        self.concurrency = max(1, concurrency)
+        self.dryRun = dry_run
+
+    def query(self, sprint, unresolved=True):
+        jql = 'fixVersion = "Sprint {}"'.format(sprint)
+        if unresolved:
+            jql += ' and resolution = Unresolved'
+        if self.projects:
+            jql += ' and project in ({})'.format(', '.join(self.projects))
+        return jql + ' order by key'
+
+    def moveSummary(self, summary):
+        return summary.replace('Sprint-{}'.format(re.sub(r'\.', '', self.sprint)),
+                               'Sprint-{}'.format(re.sub(r'\.', '', self.nextSprint)))
+
+    def payload(self, issue):
+        fields = issue['fields']
+        payload = {'project': {'key': fields['project']['key']},
+                   'issuetype': {'id': fields['issuetype']['id']},
+                   'summary': self.moveSummary(fields['summary']),
+                   'description': fields.get('description'),
+                   'components': [{'id': component['id']} for component in fields.get('components') or []],
+                   'fixVersions': [{'name': 'Sprint {}'.format(self.nextSprint)}],
+                   'labels': fields.get('labels') or []}
+        if fields.get('priority'):
+            payload['priority'] = {'id': fields['priority']['id']}
+        if fields.get('assignee'):
+            payload['assignee'] = {'name': fields['assignee']['name']}
+        return payload
+
+    def _map(self, func, items):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(func, items))
+
+    @staticmethod
+    def _attempt(func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            return '{}: {}'.format(type(e).__name__, e)
+
+    def _create(self, bulk):
+        try:
+            return self.jira.createIssues([payload for _, payload in bulk])
+        except Exception as e:
+            error = '{}: {}'.format(type(e).__name__, e)
+            return [None] * len(bulk), {k: error for k in range(len(bulk))}
+
+    def _link(self, link):
+        return self._attempt(self.jira.linkIssues, Rollover.linkType, *link)
+
+    def _close(self, item):
+        return self._attempt(self.jira.transitionIssue, *item)
+
+    def _closeTransition(self, key):
+        """The id of the transition closing an issue, with the error found if there is none."""
+        try:
+            transition_id = self.jira.findTransition(key, Rollover.transitions)
+        except Exception as e:
+            return None, '{}: {}'.format(type(e).__name__, e)
+        if transition_id is None:
+            return None, 'no {} transition'.format(' nor '.join(Rollover.transitions))
+        return transition_id, None
+
+    def run(self, emit):
+        """Rolls the sprint over, emitting one record per original issue; returns the number of failures."""
+        issues = self.jira.getQuery(self.query(self.sprint), Rollover.fields, validateQuery='warn')
+        records = OrderedDict((issue['key'], {'command': 'rollover', 'key': issue['key'],
+                                              'summary': issue['fields']['summary']}) for issue in issues)
+
+        # clones already in the next sprint, by the original they are linked to, else by project and summary;
+        # an issue still in this sprint is an original carrying both fixVersions, never a clone
+        byLink, bySummary = dict(), dict()
+        if issues:
+            current = 'Sprint {}'.format(self.sprint)
+            for issue in self.jira.getQuery(self.query(self.nextSprint, unresolved=False),
+                                            'summary,project,fixVersions,issuelinks', validateQuery='warn'):
+                fields = issue['fields']
+                versions = [version['name'] for version in fields.get('fixVersions') or []]
+                if issue['key'] in records or current in versions:
+                    continue
+                linked = [link.get('inwardIssue', link.get('outwardIssue', {})).get('key')
+                          for link in fields.get('issuelinks') or [] if link['type']['name'] == Rollover.linkType]
+                for key in linked:
+                    byLink[key] = issue['key']
+                if not linked:
+                    bySummary.setdefault((fields['project']['key'], fields['summary']), []).append(issue['key'])
+
+        payloads = OrderedDict((issue['key'], self.payload(issue)) for issue in issues)
+        originals = dict()
+        for key, payload in payloads.items():
+            originals.setdefault((payload['project']['key'], payload['summary']), []).append(key)
+
+        pending = []
+        links = []
+        for issue in issues:
+            key, payload = issue['key'], payloads[issue['key']]
+            match = (payload['project']['key'], payload['summary'])
+            if key in byLink:
+                records[key].update(status='kept', clone=byLink[key])
+            elif len(originals[match]) == 1 and len(bySummary.get(match, [])) == 1:
+                # an unlinked clone is only taken when the summary tells it from any other
+                records[key].update(status='kept', clone=bySummary[match][0])
+                links.append((bySummary[match][0], key))
+            else:
+                pending.append((issue, payload))
+
+        if self.dryRun:
+            for issue, payload in pending:
+                records[issue['key']].update(status='dry-run', clone=payload['summary'])
+            for record in records.values():
+                emit(record)
+            return 0
+
+        bulks = [pending[k:k + Rollover.bulkSize] for k in range(0, len(pending), Rollover.bulkSize)]
+        for bulk, (created, errors) in zip(bulks, self._map(self._create, bulks)):
+            for k, ((issue, _), clone) in enumerate(zip(bulk, created)):
+                if clone is None:
+                    records[issue['key']].update(status='error', error=str(errors.get(k, 'not created')))
+                else:
+                    records[issue['key']].update(status='cloned', clone=clone['key'])
+                    links.append((clone['key'], issue['key']))
+
+        for (_, key), error in zip(links, self._map(self._link, links)):
+            if error:
+                records[key].update(status='error', error=error)
+
+        # close the originals with a clone, finding the transition once per project, type and status
+        groups = OrderedDict()
+        for issue in issues:
+            if records[issue['key']].get('clone') and records[issue['key']]['status'] != 'error':
+                fields = issue['fields']
+                group = (fields['project']['key'], fields['issuetype']['id'], fields['status']['id'])
+                groups.setdefault(group, []).append(issue['key'])
+        lookups = self._map(self._closeTransition, [keys[0] for keys in groups.values()])
+        closing = []
+        for keys, (transition_id, error) in zip(groups.values(), lookups):
+            for key in keys:
+                if error:
+                    records[key].update(status='error', error=error)
+                else:
+                    closing.append((key, transition_id))
+        for (key, _), error in zip(closing, self._map(self._close, closing)):
+            if error:
+                records[key].update(status='error', error=error)
+            else:
+                records[key]['closed'] = True
+
+        failed = 0
+        for record in records.values():
+            failed += record['status'] == 'error'
+            emit(record)
+        return failed
+
+
+if __name__ == "__main__":
+    pass
@@ -33,12 +33,26 @@ class Settings:
             password = _server.find('password').text
             self._servers[name] = record(domain, username, password)
 
+        self._transport = dict()
+        _transport = root.find('transport')
+        if _transport is not None:
+            for tag, kind in (('pool_connections', int), ('pool_maxsize', int),
+                              ('connect_timeout', float), ('read_timeout', float), ('rate_limit', float)):
+                if _transport.find(tag) is not None:
+                    self._transport[tag] = kind(_transport.find(tag).text)
+            self._transport['pools'] = {pool.get('host'): int(pool.get('maxsize'))
+                                        for pool in _transport.findall('pool')}
+
         # print(len(self.__chapters))
 
     @property
     def server(self):
         return self._servers
 
+    @property
+    def transport(self):
+        return self._transport
+
     @property
     def chapters(self):
         return ('Apps', 'Cloud', 'Data', 'IoT', 'I2ND', 'Security', 'WebUI', 'Ops', 'Academy', 'Catalogue')
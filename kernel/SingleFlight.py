@@ -0,0 +1,48 @@
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Table of the calls in flight: concurrent calls with the same key share one execution."""
+    def __init__(self):
+        self._calls = dict()
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            owner = call is None
+            if owner:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,87 @@
+import re
+
+
+class Template:
+    """Issue text with ${field} and ${field.path:format} placeholders, e.g. ${deadline:%d-%m-%Y}."""
+    placeholder = re.compile(r'\$\{(?P<path>[\w.]+)(?::(?P<spec>[^}]*))?\}')
+    cacheSize = 10000
+
+    def __init__(self, text):
+        self.text = text
+        parts, paths = [], []
+        position = 0
+        for match in Template.placeholder.finditer(text):
+            parts.append(text[position:match.start()].replace('{', '{{').replace('}', '}}'))
+            path, spec = match.group('path', 'spec')
+            if path not in paths:
+                paths.append(path)
+            parts.append('{' + str(paths.index(path)) + (':' + spec if spec else '') + '}')
+            position = match.end()
+        parts.append(text[position:].replace('{', '{{').replace('}', '}}'))
+        self.pattern = ''.join(parts)
+        self.paths = tuple(tuple(path.split('.')) for path in paths)
+        self._cache = dict()
+
+    def values(self, obj):
+        values = []
+        for path in self.paths:
+            value = obj
+            for name in path:
+                value = getattr(value, name)
+            values.append(value)
+        return tuple(values)
+
+    def render(self, obj):
+        values = self.values(obj)
+        try:
+            return self._cache[values]
+        except KeyError:
+            pass
+        if len(self._cache) >= Template.cacheSize:
+            self._cache.clear()
+        text = self._cache[values] = self.pattern.format(*values)
+        return text
+
+    def __repr__(self):
+        return 'Template({!r})'.format(self.text)
+
+
+class TemplatedIssue:
+    """Issue whose summary and description are given as templates by its class."""
+    __slots__ = ('_rendered',)
+    summaryTemplate = None
+    descriptionTemplate = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in ('summaryTemplate', 'descriptionTemplate'):
+            if isinstance(cls.__dict__.get(name), str):
+                setattr(cls, name, Template(cls.__dict__[name]))
+
+    def _render(self, name):
+        try:
+            return self._rendered[name]
+        except AttributeError:
+            self._rendered = dict()
+        except KeyError:
+            pass
+        template = getattr(type(self), name + 'Template')
+        if template is None:
+            raise NotImplementedError()
+        text = self._rendered[name] = template.render(self)
+        return text
+
+    def summary(self):
+        return self._render('summary')
+
+    def description(self):
+        return self._render('description')
+
+
+def render(issues):
+    """Summary and description of every issue of a plan."""
+    return [(issue.summary(), issue.description()) for issue in issues]
+
+
+if __name__ == "__main__":
+    pass
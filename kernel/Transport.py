@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import base64
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from kernel import tool_settings
+from kernel.Offline import Offline
+
+
+class ConnectionToJIRA(Exception):
+    pass
+
+
+class WorkingOffline(ConnectionToJIRA):
+    pass
+
+
+class _Adapter(HTTPAdapter):
+    """Keep-alive pool that sends nothing while the offline mode is on."""
+    def send(self, request, *args, **kwargs):
+        if Offline.enabled:
+            raise WorkingOffline('offline mode: {} {} not sent'.format(request.method, request.url))
+        return super().send(request, *args, **kwargs)
+
+
+class _Session(requests.Session):
+    """Session logging in on its first request, and again when Jira answers 401."""
+    def __init__(self, transport):
+        super().__init__()
+        self.transport = transport
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.transport.timeout)
+        login = self.transport.authenticate()
+        answer = super().request(method, url, *args, **kwargs)
+        if answer.status_code == requests.codes.unauthorized:
+            self.transport.login(login)
+            answer = super().request(method, url, *args, **kwargs)
+        return answer
+
+
+class Transport:
+    """The one HTTP session of the process towards Jira."""
+    pool_connections = 4
+    pool_maxsize = 10
+    # lifetime assumed for session cookies that do not state their own
+    session_ttl = 3600
+    # (connect, read) seconds, for every request that does not give its own
+    timeout = (5, 30)
+    verify = False
+    instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls):
+        if cls.instance is None:
+            with cls._lock:
+                if cls.instance is None:
+                    cls.instance = Transport()
+        return cls.instance
+
+    def __init__(self):
+        if Transport.instance is not None:
+            raise ValueError("An instantiation already exists!")
+        server = tool_settings.server['JIRA']
+        self.root_url = 'https://{}'.format(server.domain)
+        self._credentials = (server.username, server.password)
+        self.filename = os.path.join(tool_settings.storeHome, 'FIWARE.jira.session.json')
+        self._login = None
+        self._loginLock = threading.Lock()
+        transport = tool_settings.transport
+        self.timeout = (transport.get('connect_timeout', Transport.timeout[0]),
+                        transport.get('read_timeout', Transport.timeout[1]))
+        self.session = _Session(self)
+        self.session.verify = Transport.verify
+        maxsize = transport.get('pool_maxsize', Transport.pool_maxsize)
+        connections = transport.get('pool_connections', Transport.pool_connections)
+        self.session.mount('https://', self._adapter(maxsize, connections))
+        self.session.mount('http://', self._adapter(maxsize, connections))
+        for host, size in transport.get('pools', dict()).items():
+            self.poolSize(host, size)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+    @staticmethod
+    def _adapter(maxsize, connections=1):
+        return _Adapter(pool_connections=connections, pool_maxsize=maxsize)
+
+    def authenticate(self):
+        """Make sure there is a session to send requests with; returns the login in use."""
+        login = self._login
+        if login is None:
+            with self._loginLock:
+                if self._login is None:
+                    self._login = self._restore() or self._connect()
+                login = self._login
+        return login
+
+    def login(self, rejected=None):
+        """Log in again, unless another thread already did since the login that was rejected."""
+        with self._loginLock:
+            if self._login is None or self._login is rejected:
+                self._login = self._connect()
+            return self._login
+
+    def _connect(self):
+        auth = '{}:{}'.format(*self._credentials)
+        keyword = base64.b64encode(bytes(auth, 'utf-8'))
+        access_key = str(keyword)[2:-1]
+        headers = {'Content-Type': 'application/json', "Authorization": "Basic {}".format(access_key)}
+        self.session.cookies.clear()
+        answer = requests.Session.request(self.session, 'GET', self.root_url, headers=headers,
+                                          verify=Transport.verify, timeout=self.timeout)
+        if answer.status_code != requests.codes.ok:
+            raise ConnectionToJIRA
+
+        expires = [cookie.expires for cookie in self.session.cookies if cookie.expires]
+        login = {'expires': min(expires, default=time.time() + Transport.session_ttl),
+                 'cookies': [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+                              'path': cookie.path} for cookie in self.session.cookies]}
+        self._save(login)
+        return login
+
+    def _restore(self):
+        try:
+            with open(self.filename) as f:
+                login = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if login.get('expires', 0) <= time.time() or not login.get('cookies'):
+            return None
+        for cookie in login['cookies']:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        return login
+
+    def _save(self, login):
+        try:
+            descriptor = os.open(self.filename + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(descriptor, 'w') as f:
+                json.dump(login, f)
+            os.replace(self.filename + '.tmp', self.filename)
+        except OSError as e:
+            print('Jira session not kept in store:', e, file=sys.stderr)
+
+    def poolSize(self, host, maxsize):
+        """Give host a pool of its own holding up to maxsize keep-alive connections."""
+        self.session.mount('https://{}/'.format(host), self._adapter(maxsize))
+
+    def mount(self, session):
+        """Make session, e.g. the one of a jira.client.JIRA, share the pools and the login of this one."""
+        for prefix, adapter in self.session.adapters.items():
+            session.mount(prefix, adapter)
+        session.cookies = self.session.cookies
+        return session
+
+    def stats(self):
+        """Connections opened and requests sent per host; the difference is the number of reuses."""
+        stats = dict()
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections, sent = stats.get(pool.host, (0, 0))
+                stats[pool.host] = (connections + pool.num_connections, sent + pool.num_requests)
+        return {host: {'connections': connections, 'requests': sent, 'reused': sent - connections}
+                for host, (connections, sent) in stats.items()}
+
+    def report(self):
+        for host, stat in sorted(self.stats().items()):
+            print('{}: {requests} requests over {connections} connections ({reused} reused)'.format(host, **stat),
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    pass